@@ -30,9 +30,177 @@ vocabulary = {
     'tmp_custom_mapping': '/superbugai-data/vocabulary_download_v5/tmp_custom_mapping_tmp.csv',
 }
 
-# CSV file column mapping
+# Number of Athena vocabulary files loaded, and of lookup tables staged from them, at
+# once, each by its own worker process and connection (1 to load them one after the
+# other). The largest files are started first.
+vocabulary_workers = 4
+
+# The Athena vocabulary tables are saved with a fingerprint of the files (their hash
+# and the versions in VOCABULARY.csv), so that the files are only loaded again when
+# they change. When another ETL schema (e.g. of an earlier run with a different date
+# suffix) has the tables of the same files, they are
+#   'clone'     - copied from it by the database (default)
+#   'reference' - used from it through views, without copying them
+#   None        - not used; the files are loaded on every run
+vocabulary_cache = 'clone'
+
+# Import options
+
+# How the EHR data is imported to the source schema
+#   'full'        - drop, recreate and load every table
+#   'incremental' - tables whose files are unchanged since the last import (same paths,
+#                   sizes and modification times) are skipped;
+#                   otherwise only the rows beyond the watermark recorded by the last
+#                   import (the maximum of the table's watermark_column) are loaded, and
+#                   upserted on the primary key or appended to the table. Tables with
+#                   neither a watermark column nor a primary key are imported in full.
+# The watermarks are kept in the IMPORT_WATERMARK table of the source schema.
+import_mode = 'full'
+
+# Resume an import that was interrupted part way through a table. Each chunk is
+# committed together with the number of rows of its file loaded so far (in the
+# IMPORT_PROGRESS table of the source schema), and the next import of the same files
+# skips the rows already loaded instead of starting the table again.
+import_resume = True
+
+# Import a sample of the patients, e.g. for quick development runs. Only the rows of
+# the sampled subjects are loaded, filtered while the files are read: either the
+# subjects whose hashed import_sample_column falls within import_sample_fraction
+# (e.g. 0.01 for 1%, the same subjects in every table and run), or the subjects listed
+# in import_sample_subjects (a list of ids, or a file with one id per line). Tables
+# without the column (the dictionaries) are imported in full. None to import everything.
+# Changing the sample needs a full import.
+import_sample_fraction = None
+import_sample_subjects = None
+import_sample_column = 'subject_id'
+
+# Method used to write the EHR data to the source schema
+#   'copy'   - stream each dataframe with COPY ... FROM STDIN (fast)
+#   'binary' - stream each dataframe with COPY ... FROM STDIN (FORMAT binary), sending the
+#              numbers and timestamps in the binary format the database stores them in
+#              rather than as text it has to parse. Used for the tables whose columns are
+#              all integers, floats, timestamps, dates or text; other tables, and chunks
+#              with values that do not convert (e.g. a malformed timestamp), are written
+#              as with 'copy'.
+#   'insert' - batched INSERT statements using psycopg2.extras.execute_batch
+import_write_method = 'copy'
+
+# Engine used to parse the source files
+#   'pandas'  - pandas.read_csv
+#   'pyarrow' - pyarrow.csv, parsing on multiple threads into typed columns that are
+#               written without converting them to Python objects (needs pyarrow)
+# The engine can be chosen per source table with 'reader_engine' in its definition below.
+# The Athena vocabulary files are not parsed, they are copied as they are by the database.
+import_reader_engine = 'pandas'
+
+# The source files are streamed in chunks so that memory use is bounded by the chunk
+# size rather than the file size. The chunk size is given either as a number of
+# rows or as an approximate number of bytes (which takes precedence when set).
+# Set both to None to read each file in one go.
+import_chunk_rows = 1000000
+import_chunk_bytes = None
+
+# Number of chunks of a file read ahead, by a separate thread, while the last chunk is
+# written, so that parsing and writing overlap (0 to read each chunk only once the last
+# one is written). Each chunk read ahead is held in memory until it is written.
+import_read_ahead_chunks = 1
+
+# Partitioning of the tables with a partition_column (CHARTEVENTS on itemid)
+#   'range'    - declarative PARTITION BY RANGE with a default partition
+#   'inherits' - child tables using INHERITS with a row level insert trigger
+# Either way each chunk is copied straight into its partitions.
+import_partitioning = 'range'
+
+# Hash partition the tables with a hash_partition_column (LABEVENTS and CHARTEVENTS on
+# subject_id) into this many partitions, in place of their partition_column, so that
+# per patient joins and aggregates can be done partition by partition (with
+# enable_partitionwise_join and enable_partitionwise_aggregate). 0 to not hash partition.
+import_hash_partitions = 0
+
+# The file_name of a table may also be a list of files or a glob
+# pattern (e.g. '/superbugai-data/mimiciv/1.0/icu/xa*') to import a file split into
+# parts. The parts are imported in parallel by this many worker processes, each with
+# its own database connection.
+#
+# Files ending in .parquet, or a directory of them (e.g. a partitioned dataset), are
+# read with pyarrow one row group at a time, reading only the mapped columns.
+import_file_workers = 4
+
+# A single CSV file larger than this many bytes (e.g. CHARTEVENTS) is imported in byte
+# ranges of about this size by the file workers, without having to split it first. The
+# ranges are cut at record boundaries found by scanning the file once for quoted fields
+# (None to import each file in one piece).
+import_split_bytes = 2 ** 30
+
+# Set aside the rows the database rejects (a value too long for its column, a malformed
+# timestamp, ...) instead of failing the import. A chunk that fails is split in halves
+# until the failing rows are found; these are saved with the error to the
+# IMPORT_REJECTS table of the source schema and the other rows are loaded.
+import_reject_rows = False
+
+# When the source files are on the database host, copy them with COPY ... FROM 'file'
+# on the server rather than streaming them through Python. This needs a superuser or
+# the pg_read_server_files role, the same path on both hosts, and files whose columns
+# are all imported; compressed and Parquet files, and files the server cannot read,
+# are streamed from the client as usual.
+import_server_copy = False
+
+# Number of source tables imported at once, each by its own worker process and
+# connection (1 to import them one after the other). A table is only started when the
+# estimated memory of the tables being imported stays within import_memory_budget
+# (bytes, None for half of the memory available when the import starts). The memory
+# of a table is estimated as the size of its data held at once (a chunk, or the file
+# when it is smaller) times import_memory_expansion.
+import_table_workers = 1
+import_memory_budget = None
+import_memory_expansion = 3.0
+
+# Add the primary keys of the source tables after the data is loaded instead of
+# maintaining them while loading
+import_deferred_constraints = True
+
+# Create the source tables UNLOGGED while loading (no WAL is written, but the tables
+# are emptied if the database crashes), and switch them to LOGGED once loaded. Keep
+# import_set_logged = True unless the source tables can be imported again after a
+# crash: the database empties the tables left UNLOGGED without warning.
+import_unlogged_tables = True
+import_set_logged = True
+
+# Compressed input files (e.g. labevents.csv.gz) are decompressed while they are read,
+# by the command given for their extension running in a separate process (use e.g.
+# ['pigz', '-dc'] for parallel gzip decompression). Set to {} to decompress in the
+# reading process instead (.zst files then need the zstandard package).
+import_decompress_commands = {
+    '.gz': ['gzip', '-dc'],
+    '.zst': ['zstd', '-dc'],
+}
+
+# Rows, bytes, parse and write time, rows/s and peak memory of every imported table
+# and file are recorded in the IMPORT_METRICS table of the source schema, and written
+# to this JSON report at the end of the run (e.g. '/path/to/import_metrics.json', None
+# to skip the report).
+import_metrics_report = None
+
+# Source tables
+#
+# table_name       - name of the table created in the source schema
+# file_name        - CSV or Parquet file to import (see above for lists, patterns, directories and compression)
+# column_mapping   - standard column name: column name in the file
+# columns          - standard column name: SQL type of the column, including NOT NULL
+# primary_key      - standard column names of the primary key
+# reader_engine    - optional, overrides import_reader_engine for the table
+# watermark_column - optional, column increasing with new rows, used by the incremental import
+# partition_column - optional, column the table is range partitioned on, with the
+# partition_bounds   lower bounds of the partitions followed by the upper bound of the last
+# hash_partition_column - optional, column the table is hash partitioned on when
+#                    import_hash_partitions is set
+# parsed_columns   - optional, free text columns whose number and unit (e.g. '12.5 mg')
+#                    are parsed on import into the <column>_parsed_num and
+#                    <column>_parsed_unit columns, which are listed in columns but not
+#                    in column_mapping
 
 patients = {
+    'table_name': 'PATIENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/patients.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -42,9 +210,19 @@ patients = {
         'anchor_year_group': 'anchor_year_group',
         'dod': 'dod'
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'gender': 'VARCHAR(5) NOT NULL',
+        'anchor_age': 'INT NOT NULL',
+        'anchor_year': 'INT NOT NULL',
+        'anchor_year_group': 'VARCHAR(12) NOT NULL',
+        'dod': 'TIMESTAMP(0)',
+    },
+    'primary_key': ['subject_id'],
 }
 
 admissions = {
+    'table_name': 'ADMISSIONS',
     'file_name': '/superbugai-data/mimiciv/test_data/admissions.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -63,9 +241,28 @@ admissions = {
         'edouttime': 'edouttime',
         'hospital_expire_flag': 'hospital_expire_flag',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'admittime': 'TIMESTAMP(0) NOT NULL',
+        'dischtime': 'TIMESTAMP(0) NOT NULL',
+        'deathtime': 'TIMESTAMP(0)',
+        'admission_type': 'VARCHAR(50) NOT NULL',
+        'admission_location': 'VARCHAR(50)',
+        'discharge_location': 'VARCHAR(50)',
+        'insurance': 'VARCHAR(255) NOT NULL',
+        'language': 'VARCHAR(10)',
+        'marital_status': 'VARCHAR(50)',
+        'ethnicity': 'VARCHAR(200) NOT NULL',
+        'edregtime': 'TIMESTAMP(0)',
+        'edouttime': 'TIMESTAMP(0)',
+        'hospital_expire_flag': 'SMALLINT',
+    },
+    'primary_key': ['hadm_id'],
 }
 
 transfers = {
+    'table_name': 'TRANSFERS',
     'file_name': '/superbugai-data/mimiciv/test_data/transfers.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -76,9 +273,20 @@ transfers = {
         'intime': 'intime',
         'outtime': 'outtime',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT',
+        'transfer_id': 'INT NOT NULL',
+        'eventtype': 'VARCHAR(20) NOT NULL',
+        'careunit': 'VARCHAR(50)',
+        'intime': 'TIMESTAMP(0)',
+        'outtime': 'TIMESTAMP(0)',
+    },
+    'primary_key': ['subject_id', 'transfer_id'],
 }
 
 diagnoses_icd = {
+    'table_name': 'DIAGNOSES_ICD',
     'file_name': '/superbugai-data/mimiciv/test_data/diagnoses_icd.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -87,9 +295,18 @@ diagnoses_icd = {
         'icd_code': 'icd_code',
         'icd_version': 'icd_version',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'seq_num': 'INT NOT NULL',
+        'icd_code': 'VARCHAR(10) NOT NULL',
+        'icd_version': 'INT NOT NULL',
+    },
+    'primary_key': [],
 }
 
 services = {
+    'table_name': 'SERVICES',
     'file_name': '/superbugai-data/mimiciv/test_data/services.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -98,9 +315,18 @@ services = {
         'prev_service': 'prev_service',
         'curr_service': 'curr_service',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'transfertime': 'TIMESTAMP(0) NOT NULL',
+        'prev_service': 'VARCHAR(20)',
+        'curr_service': 'VARCHAR(20) NOT NULL',
+    },
+    'primary_key': [],
 }
 
 labevents = {
+    'table_name': 'LABEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/labevents.csv',
     'column_mapping': {
         'labevent_id': 'labevent_id',
@@ -119,9 +345,33 @@ labevents = {
         'priority': 'priority',
         'comments': 'comments',
     },
+    'columns': {
+        'labevent_id': 'INT NOT NULL',
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT',
+        'specimen_id': 'INT NOT NULL',
+        'itemid': 'INT NOT NULL',
+        'charttime': 'TIMESTAMP NOT NULL',
+        'storetime': 'TIMESTAMP',
+        'value': 'VARCHAR(200)',
+        'valuenum': 'DOUBLE PRECISION',
+        'valueuom': 'VARCHAR(20)',
+        'ref_range_lower': 'DOUBLE PRECISION',
+        'ref_range_upper': 'DOUBLE PRECISION',
+        'flag': 'VARCHAR(10)',
+        'priority': 'VARCHAR(7)',
+        'comments': 'VARCHAR(620)',
+        'value_parsed_num': 'DOUBLE PRECISION',
+        'value_parsed_unit': 'VARCHAR(200)',
+    },
+    'primary_key': ['labevent_id'],
+    'watermark_column': 'labevent_id',
+    'hash_partition_column': 'subject_id',
+    'parsed_columns': ['value'],
 }
 
 d_labitems = {
+    'table_name': 'D_LABITEMS',
     'file_name': '/superbugai-data/mimiciv/test_data/d_labitems.csv',
     'column_mapping': {
         'itemid': 'itemid',
@@ -130,9 +380,18 @@ d_labitems = {
         'category': 'category',
         'loinc_code': 'loinc_code',
     },
+    'columns': {
+        'itemid': 'INT NOT NULL',
+        'label': 'VARCHAR(50)',
+        'fluid': 'VARCHAR(50) NOT NULL',
+        'category': 'VARCHAR(50) NOT NULL',
+        'loinc_code': 'VARCHAR(50)',
+    },
+    'primary_key': ['itemid'],
 }
 
 procedures_icd = {
+    'table_name': 'PROCEDURES_ICD',
     'file_name': '/superbugai-data/mimiciv/test_data/procedures_icd.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -142,9 +401,19 @@ procedures_icd = {
         'icd_code': 'icd_code',
         'icd_version': 'icd_version',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'seq_num': 'INT NOT NULL',
+        'chartdate': 'TIMESTAMP(0) NOT NULL',
+        'icd_code': 'VARCHAR(10) NOT NULL',
+        'icd_version': 'INT NOT NULL',
+    },
+    'primary_key': [],
 }
 
 hcpcsevents = {
+    'table_name': 'HCPCSEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/hcpcsevents.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -154,9 +423,19 @@ hcpcsevents = {
         'seq_num': 'seq_num',
         'short_description': 'short_description',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'chartdate': 'TIMESTAMP(0) NOT NULL',
+        'hcpcs_cd': 'VARCHAR(5) NOT NULL',
+        'seq_num': 'INT NOT NULL',
+        'short_description': 'VARCHAR(170) NOT NULL',
+    },
+    'primary_key': [],
 }
 
 drgcodes = {
+    'table_name': 'DRGCODES',
     'file_name': '/superbugai-data/mimiciv/test_data/drgcodes.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -167,9 +446,20 @@ drgcodes = {
         'drg_severity': 'drg_severity',
         'drg_mortality': 'drg_mortality',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'drg_type': 'VARCHAR(4) NOT NULL',
+        'drg_code': 'VARCHAR(10) NOT NULL',
+        'description': 'VARCHAR(195)',
+        'drg_severity': 'SMALLINT',
+        'drg_mortality': 'SMALLINT',
+    },
+    'primary_key': [],
 }
 
 prescriptions = {
+    'table_name': 'PRESCRIPTIONS',
     'file_name': '/superbugai-data/mimiciv/test_data/prescriptions.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -190,9 +480,33 @@ prescriptions = {
         'doses_per_24_hrs': 'doses_per_24_hrs',
         'route': 'route',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'pharmacy_id': 'INT NOT NULL',
+        'starttime': 'TIMESTAMP(0)',
+        'stoptime': 'TIMESTAMP(0)',
+        'drug_type': 'VARCHAR(10) NOT NULL',
+        'drug': 'VARCHAR(100)',
+        'gsn': 'VARCHAR(250)',
+        'ndc': 'VARCHAR(20)',
+        'prod_strength': 'VARCHAR(120)',
+        'form_rx': 'VARCHAR(10)',
+        'dose_val_rx': 'VARCHAR(50)',
+        'dose_unit_rx': 'VARCHAR(50)',
+        'form_val_disp': 'VARCHAR(30)',
+        'form_unit_disp': 'VARCHAR(30)',
+        'doses_per_24_hrs': 'DOUBLE PRECISION',
+        'route': 'VARCHAR(30)',
+        'form_val_disp_parsed_num': 'DOUBLE PRECISION',
+        'form_val_disp_parsed_unit': 'VARCHAR(30)',
+    },
+    'primary_key': [],
+    'parsed_columns': ['form_val_disp'],
 }
 
 microbiologyevents = {
+    'table_name': 'MICROBIOLOGYEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/microbiologyevents.csv',
     'column_mapping': {
         'microevent_id': 'microevent_id',
@@ -220,9 +534,38 @@ microbiologyevents = {
         'interpretation': 'interpretation',
         'comments': 'comments',
     },
+    'columns': {
+        'microevent_id': 'INT NOT NULL',
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT',
+        'micro_specimen_id': 'INT NOT NULL',
+        'chartdate': 'TIMESTAMP(0) NOT NULL',
+        'charttime': 'TIMESTAMP(0)',
+        'spec_itemid': 'INT NOT NULL',
+        'spec_type_desc': 'VARCHAR(100) NOT NULL',
+        'test_seq': 'INT NOT NULL',
+        'storedate': 'TIMESTAMP(0)',
+        'storetime': 'TIMESTAMP(0)',
+        'test_itemid': 'INT NOT NULL',
+        'test_name': 'VARCHAR(100) NOT NULL',
+        'org_itemid': 'INT',
+        'org_name': 'VARCHAR(100)',
+        'isolate_num': 'SMALLINT',
+        'quantity': 'VARCHAR(50)',
+        'ab_itemid': 'INT',
+        'ab_name': 'VARCHAR(30)',
+        'dilution_text': 'VARCHAR(10)',
+        'dilution_comparison': 'VARCHAR(20)',
+        'dilution_value': 'DOUBLE PRECISION',
+        'interpretation': 'VARCHAR(5)',
+        'comments': 'VARCHAR(750)',
+    },
+    'primary_key': ['microevent_id'],
+    'watermark_column': 'microevent_id',
 }
 
 pharmacy = {
+    'table_name': 'PHARMACY',
     'file_name': '/superbugai-data/mimiciv/test_data/pharmacy.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -253,9 +596,40 @@ pharmacy = {
         'dispensation': 'dispensation',
         'fill_quantity': 'fill_quantity',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'pharmacy_id': 'INT NOT NULL',
+        'poe_id': 'VARCHAR(25)',
+        'starttime': 'TIMESTAMP(0)',
+        'stoptime': 'TIMESTAMP(0)',
+        'medication': 'VARCHAR(100)',
+        'proc_type': 'VARCHAR(50) NOT NULL',
+        'status': 'VARCHAR(50) NOT NULL',
+        'entertime': 'TIMESTAMP(0) NOT NULL',
+        'verifiedtime': 'TIMESTAMP(0)',
+        'route': 'VARCHAR(30)',
+        'frequency': 'VARCHAR(30)',
+        'disp_sched': 'VARCHAR(100)',
+        'infusion_type': 'VARCHAR(15)',
+        'sliding_scale': 'VARCHAR(5)',
+        'lockout_interval': 'VARCHAR(50)',
+        'basal_rate': 'DOUBLE PRECISION',
+        'one_hr_max': 'VARCHAR(30)',
+        'doses_per_24_hrs': 'DOUBLE PRECISION',
+        'duration': 'DOUBLE PRECISION',
+        'duration_interval': 'VARCHAR(50)',
+        'expiration_value': 'INT',
+        'expiration_unit': 'VARCHAR(50)',
+        'expirationdate': 'TIMESTAMP(0)',
+        'dispensation': 'VARCHAR(50)',
+        'fill_quantity': 'VARCHAR(30)',
+    },
+    'primary_key': ['pharmacy_id'],
 }
 
 procedureevents = {
+    'table_name': 'PROCEDUREEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/procedureevents.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -285,9 +659,39 @@ procedureevents = {
         'originalamount': 'originalamount',
         'originalrate': 'originalrate',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'stay_id': 'INT NOT NULL',
+        'starttime': 'TIMESTAMP(0) NOT NULL',
+        'endtime': 'TIMESTAMP(0) NOT NULL',
+        'storetime': 'TIMESTAMP(0) NOT NULL',
+        'itemid': 'INT NOT NULL',
+        'value': 'DOUBLE PRECISION NOT NULL',
+        'valueuom': 'VARCHAR(30) NOT NULL',
+        'location': 'VARCHAR(30)',
+        'locationcategory': 'VARCHAR(30)',
+        'orderid': 'INT NOT NULL',
+        'linkorderid': 'INT NOT NULL',
+        'ordercategoryname': 'VARCHAR(100) NOT NULL',
+        'secondaryordercategoryname': 'VARCHAR(100)',
+        'ordercategorydescription': 'VARCHAR(50) NOT NULL',
+        'patientweight': 'DOUBLE PRECISION NOT NULL',
+        'totalamount': 'DOUBLE PRECISION',
+        'totalamountuom': 'VARCHAR(50)',
+        'isopenbag': 'SMALLINT NOT NULL',
+        'continueinnextdept': 'SMALLINT NOT NULL',
+        'cancelreason': 'SMALLINT NOT NULL',
+        'statusdescription': 'VARCHAR(30) NOT NULL',
+        'comments_date': 'TIMESTAMP(0)',
+        'originalamount': 'DOUBLE PRECISION NOT NULL',
+        'originalrate': 'DOUBLE PRECISION NOT NULL',
+    },
+    'primary_key': [],
 }
 
 d_items = {
+    'table_name': 'D_ITEMS',
     'file_name': '/superbugai-data/mimiciv/test_data/d_items.csv',
     'column_mapping': {
         'itemid': 'itemid',
@@ -300,9 +704,22 @@ d_items = {
         'lownormalvalue': 'lownormalvalue',
         'highnormalvalue': 'highnormalvalue',
     },
+    'columns': {
+        'itemid': 'INT NOT NULL',
+        'label': 'VARCHAR(200) NOT NULL',
+        'abbreviation': 'VARCHAR(100) NOT NULL',
+        'linksto': 'VARCHAR(50) NOT NULL',
+        'category': 'VARCHAR(100) NOT NULL',
+        'unitname': 'VARCHAR(100)',
+        'param_type': 'VARCHAR(30) NOT NULL',
+        'lownormalvalue': 'DOUBLE PRECISION',
+        'highnormalvalue': 'DOUBLE PRECISION',
+    },
+    'primary_key': ['itemid'],
 }
 
 datetimeevents = {
+    'table_name': 'DATETIMEEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/datetimeevents.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -315,9 +732,23 @@ datetimeevents = {
         'valueuom': 'valueuom',
         'warning': 'warning',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT',
+        'stay_id': 'INT',
+        'charttime': 'TIMESTAMP(0) NOT NULL',
+        'storetime': 'TIMESTAMP(0) NOT NULL',
+        'itemid': 'INT NOT NULL',
+        'value': 'TIMESTAMP(0) NOT NULL',
+        'valueuom': 'VARCHAR(50) NOT NULL',
+        'warning': 'SMALLINT NOT NULL',
+    },
+    'primary_key': [],
+    'watermark_column': 'charttime',
 }
 
 chartevents = {
+    'table_name': 'CHARTEVENTS',
     'file_name': '/superbugai-data/mimiciv/test_data/chartevents.csv',
     'column_mapping': {
         'subject_id': 'subject_id',
@@ -331,8 +762,50 @@ chartevents = {
         'valueuom': 'valueuom',
         'warning': 'warning',
     },
+    'columns': {
+        'subject_id': 'INT NOT NULL',
+        'hadm_id': 'INT NOT NULL',
+        'stay_id': 'INT NOT NULL',
+        'charttime': 'TIMESTAMP(0) NOT NULL',
+        'storetime': 'TIMESTAMP(0)',
+        'itemid': 'INT NOT NULL',
+        'value': 'VARCHAR(160)',
+        'valuenum': 'DOUBLE PRECISION',
+        'valueuom': 'VARCHAR(20)',
+        'warning': 'SMALLINT NOT NULL',
+        'value_parsed_num': 'DOUBLE PRECISION',
+        'value_parsed_unit': 'VARCHAR(160)',
+    },
+    'primary_key': [],
+    'watermark_column': 'charttime',
+    'parsed_columns': ['value'],
+    'partition_column': 'itemid',
+    'hash_partition_column': 'subject_id',
+    'partition_bounds': [220000, 221000, 222000, 223000, 224000, 225000, 226000, 227000, 228000, 229000, 230000],
 }
 
+# Tables imported to the source schema, in order
+
+source_tables = [
+    patients,
+    admissions,
+    transfers,
+    diagnoses_icd,
+    services,
+    labevents,
+    d_labitems,
+    procedures_icd,
+    hcpcsevents,
+    drgcodes,
+    prescriptions,
+    microbiologyevents,
+    pharmacy,
+    procedureevents,
+    d_items,
+    datetimeevents,
+    chartevents,
+]
+
 customMapping = {
     'admission_type': {
         'source_attributes': {
@@ -1,3 +1,5 @@
+import contextlib
+import io
 import logging
 
 log = logging.getLogger("Standardise")
@@ -5,15 +7,221 @@ log = logging.getLogger("Standardise")
 import Config
 
 
-def __saveDataframe(con, destinationSchemaName, destinationTableName, df, dfColumns):
+def __saveDataframe(con, destinationSchemaName, destinationTableName, df, dfColumns, columnTypes=None):
+
+    log.info("Importing data to table: " + destinationSchemaName + '.' + destinationTableName)
+
+    # The data is committed by the caller, together with the import progress
+
+    if Config.import_write_method == 'copy':
+        __copyDataframe(con=con, destinationSchemaName=destinationSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns)
+    elif Config.import_write_method == 'binary':
+        __copyBinaryDataframe(con=con, destinationSchemaName=destinationSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns, columnTypes=columnTypes)
+    elif Config.import_write_method == 'insert':
+        __insertDataframe(con=con, destinationSchemaName=destinationSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns)
+    else:
+        raise ValueError("Unknown import_write_method: " + str(Config.import_write_method))
+
+
+def __encodeDataframe(df, dfColumns):
+
+    # Missing values of any type are written as the unquoted empty string, which COPY
+    # reads as NULL.
+    if __isArrowTable(df):
+        import pyarrow
+        import pyarrow.csv
+
+        sink = pyarrow.BufferOutputStream()
+        pyarrow.csv.write_csv(df.select(dfColumns), sink, write_options=pyarrow.csv.WriteOptions(include_header=False))
+        return pyarrow.BufferReader(sink.getvalue())
+
+    buffer = io.StringIO()
+    df[dfColumns].to_csv(buffer, sep=',', header=False, index=False, na_rep='')
+    buffer.seek(0)
+    return buffer
+
+
+def __copyDataframe(con, destinationSchemaName, destinationTableName, df, dfColumns):
+
+    if len(df) > 0:
+        table = destinationSchemaName + '.' + destinationTableName
+        columns = '"' + '", "'.join(dfColumns) + '"'
+        copy_stmt = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, DELIMITER ',', NULL '')".format(table, columns)
+        buffer = __encodeDataframe(df=df, dfColumns=dfColumns)
+        try:
+            cur = con.cursor()
+            cur.copy_expert(copy_stmt, buffer)
+        finally:
+            cur.close()
+
+
+def __getBinaryType(sqlType):
+
+    # Big-endian NumPy type, or 'timestamp', 'date' or 'text', of the values of a
+    # column in the binary COPY format. None for the types not supported.
+    baseType = sqlType.upper().split('(')[0].replace('NOT NULL', '').strip()
+    return {
+        'SMALLINT': '>i2',
+        'INT': '>i4',
+        'INTEGER': '>i4',
+        'BIGINT': '>i8',
+        'REAL': '>f4',
+        'FLOAT': '>f8',
+        'DOUBLE PRECISION': '>f8',
+        'TIMESTAMP': 'timestamp',
+        'DATE': 'date',
+        'VARCHAR': 'text',
+        'CHARACTER VARYING': 'text',
+        'TEXT': 'text',
+        }.get(baseType)
+
+
+def __encodeBinaryColumn(column, binaryType):
 
     import numpy as np
+
+    # Returns the length of the value of each row (-1 for NULL) with either a matrix of
+    # the fixed width values, or the variable width values concatenated. None when the
+    # values cannot be converted exactly, for the rows to be sent as text instead and
+    # checked by the database.
+    if __isArrowTable(column):
+        import pyarrow as pa
+        import pyarrow.compute
+
+        isNull = column.is_null().to_numpy(zero_copy_only=False)
+        if binaryType == 'text':
+            array = pyarrow.compute.cast(column, pa.large_string()).combine_chunks()
+            offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+            data = np.frombuffer(array.buffers()[2], dtype=np.uint8) if array.buffers()[2] is not None else np.empty(0, dtype=np.uint8)
+            return np.where(isNull, -1, np.diff(offsets)), (data, offsets[:-1])
+        if binaryType in ('timestamp', 'date'):
+            try:
+                values = pyarrow.compute.cast(column, pa.timestamp('us')).to_numpy()
+            except pa.ArrowInvalid:
+                return None
+        else:
+            values = pyarrow.compute.fill_null(column, 0).to_numpy()
+    else:
+        import pandas as pd
+
+        isNull = column.isna().to_numpy()
+        if binaryType == 'text':
+            # Empty strings are NULL, as in the text written by to_csv
+            isNull = isNull | (column == '').to_numpy()
+            encoded = [str(value).encode('utf-8') for value in column[~isNull]]
+            lengths = np.full(len(column), -1, dtype=np.int64)
+            lengths[~isNull] = [len(value) for value in encoded]
+            data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            return lengths, (data, np.cumsum(np.maximum(lengths, 0)) - np.maximum(lengths, 0))
+        if binaryType in ('timestamp', 'date'):
+            column = pd.to_datetime(column, errors='coerce')
+            if column.dtype.kind != 'M' or (column.isna().to_numpy() & ~isNull).any():
+                return None
+            values = column.to_numpy(dtype='datetime64[us]', na_value=np.datetime64(0, 'us'))
+        elif binaryType.startswith('>i'):
+            values = column.to_numpy(dtype='int64', na_value=0)
+        else:
+            values = column.to_numpy(dtype='float64', na_value=np.nan)
+
+    # Timestamps are microseconds, and dates days, since 2000-01-01
+    if binaryType == 'timestamp':
+        values, binaryType = values.astype(np.int64) - 946684800000000, '>i8'
+    elif binaryType == 'date':
+        if (values.astype('datetime64[D]') != values)[~isNull].any():
+            return None
+        values, binaryType = values.astype('datetime64[D]').astype(np.int64) - 10957, '>i4'
+    elif binaryType.startswith('>i'):
+        typeInfo = np.iinfo(binaryType)
+        if ((values < typeInfo.min) | (values > typeInfo.max))[~isNull].any():
+            return None
+
+    width = np.dtype(binaryType).itemsize
+    matrix = values.astype(binaryType).view(np.uint8).reshape(len(values), width)
+    return np.where(isNull, -1, width), matrix
+
+
+def __encodeBinaryDataframe(df, dfColumns, columnTypes, blockRows=65536):
+
+    import numpy as np
+
+    binaryTypes = [__getBinaryType(columnType) for columnType in columnTypes]
+    buffer = io.BytesIO()
+    buffer.write(b'PGCOPY\n\xff\r\n\x00' + np.array([0, 0], dtype='>i4').tobytes())
+
+    # Rows are encoded in blocks to bound the memory of the index arrays. Each row is
+    # the number of fields followed by the length and the value of each field, placed
+    # with vectorised scatters into the block.
+    for start in range(0, len(df), blockRows):
+        block = __sliceDataframe(df, start, min(start + blockRows, len(df)))
+        fields = []
+        for column, binaryType in zip(dfColumns, binaryTypes):
+            field = __encodeBinaryColumn(column=block.column(column) if __isArrowTable(block) else block[column], binaryType=binaryType)
+            if field is None:
+                return None
+            fields.append(field)
+
+        rowSizes = 2 + sum(4 + np.maximum(lengths, 0) for lengths, values in fields)
+        out = np.empty(int(rowSizes.sum()), dtype=np.uint8)
+        positions = np.cumsum(rowSizes) - rowSizes
+        out[positions[:, None] + np.arange(2)] = np.frombuffer(np.array(len(dfColumns), dtype='>i2').tobytes(), dtype=np.uint8)
+        positions = positions + 2
+        for lengths, values in fields:
+            out[positions[:, None] + np.arange(4)] = lengths.astype('>i4').view(np.uint8).reshape(len(lengths), 4)
+            positions = positions + 4
+            notNull = lengths >= 0
+            if isinstance(values, tuple):
+                data, starts = values
+                valueLengths = lengths[notNull]
+                firstBytes = np.cumsum(valueLengths) - valueLengths
+                byteOffsets = np.arange(int(valueLengths.sum())) - np.repeat(firstBytes, valueLengths)
+                out[np.repeat(positions[notNull], valueLengths) + byteOffsets] = data[np.repeat(starts[notNull], valueLengths) + byteOffsets]
+            else:
+                out[positions[notNull][:, None] + np.arange(values.shape[1])] = values[notNull]
+            positions = positions + np.maximum(lengths, 0)
+        buffer.write(out.tobytes())
+
+    buffer.write(np.array(-1, dtype='>i2').tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def __copyBinaryDataframe(con, destinationSchemaName, destinationTableName, df, dfColumns, columnTypes):
+
+    # Tables with a column of a type not supported, and chunks with values that do not
+    # convert, are written as text
+    if columnTypes is None or any(__getBinaryType(columnType) is None for columnType in columnTypes):
+        __copyDataframe(con=con, destinationSchemaName=destinationSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns)
+        return
+
+    if len(df) > 0:
+        buffer = __encodeBinaryDataframe(df=df, dfColumns=dfColumns, columnTypes=columnTypes)
+        if buffer is None:
+            log.info("Values of table: " + destinationSchemaName + '.' + destinationTableName + " do not convert to binary, copying them as text")
+            __copyDataframe(con=con, destinationSchemaName=destinationSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns)
+            return
+        table = destinationSchemaName + '.' + destinationTableName
+        columns = '"' + '", "'.join(dfColumns) + '"'
+        copy_stmt = "COPY {} ({}) FROM STDIN WITH (FORMAT binary)".format(table, columns)
+        try:
+            cur = con.cursor()
+            cur.copy_expert(copy_stmt, buffer)
+        finally:
+            cur.close()
+
+
+def __insertDataframe(con, destinationSchemaName, destinationTableName, df, dfColumns):
+
+    import numpy as np
+    import pandas as pd
     import psycopg2.extras
     import psycopg2.extensions
 
     psycopg2.extensions.register_adapter(np.int64, psycopg2._psycopg.AsIs)
 
-    log.info("Importing data to table: " + destinationSchemaName + '.' + destinationTableName)
+    if __isArrowTable(df):
+        import pyarrow
+
+        df = df.select(dfColumns).to_pandas(types_mapper={pyarrow.int64(): pd.Int64Dtype()}.get)
 
     if len(df) > 0:
         table = destinationSchemaName + '.' + destinationTableName
@@ -22,1078 +230,1512 @@ def __saveDataframe(con, destinationSchemaName, destinationTableName, df, dfColu
         insert_stmt = "INSERT INTO {} ({}) {}".format(table, columns, values)
         try:
             cur = con.cursor()
-            psycopg2.extras.execute_batch(cur, insert_stmt, df[dfColumns].values)
-            con.commit()
+            # Missing values of any type are inserted as NULL
+            values = df[dfColumns].astype(object)
+            values = values.where(values.notna(), None).values
+            psycopg2.extras.execute_batch(cur, insert_stmt, values)
         finally:
             cur.close()
 
 
-def importPatients(con, sourceSchemaName, filePath, fileSeparator):
+def __getDecompressCommand(filePath):
 
-    log.info("Creating table: " + sourceSchemaName + ".PATIENTS")
+    for extension, command in Config.import_decompress_commands.items():
+        if filePath.endswith(extension):
+            return command
+    return None
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.PATIENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.PATIENTS
-        (
-            SUBJECT_ID INT NOT NULL,
-            GENDER VARCHAR(5) NOT NULL,
-            ANCHOR_AGE INT NOT NULL,
-            ANCHOR_YEAR INT NOT NULL,
-            ANCHOR_YEAR_GROUP VARCHAR(12) NOT NULL,
-            DOD TIMESTAMP(0), -- This is a NaN column
-
-            CONSTRAINT pat_subid_unique UNIQUE (SUBJECT_ID),
-            CONSTRAINT pat_subid_pk PRIMARY KEY (SUBJECT_ID)
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
-    import numpy as np
+class __FileRange(io.RawIOBase):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df.dod.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.patients['column_mapping']['subject_id'],
-        Config.patients['column_mapping']['gender'],
-        Config.patients['column_mapping']['anchor_age'],
-        Config.patients['column_mapping']['anchor_year'],
-        Config.patients['column_mapping']['anchor_year_group'],
-        Config.patients['column_mapping']['dod'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='PATIENTS', df=df, dfColumns=dfColumns)
+    # Reads a file up to a number of bytes from its current position
+    def __init__(self, f, size):
+        self.f = f
+        self.remaining = size
 
+    def readable(self):
+        return True
 
-def importAdmissions(con, sourceSchemaName, filePath, fileSeparator):
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        read = self.f.readinto(memoryview(buffer)[:size])
+        self.remaining -= read
+        return read
 
-    log.info("Creating table: " + sourceSchemaName + ".ADMISSIONS")
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.ADMISSIONS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.ADMISSIONS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            ADMITTIME TIMESTAMP(0) NOT NULL,
-            DISCHTIME TIMESTAMP(0) NOT NULL,
-            DEATHTIME TIMESTAMP(0),
-            ADMISSION_TYPE VARCHAR(50) NOT NULL,
-            ADMISSION_LOCATION VARCHAR(50), -- There is NULL in this version
-            DISCHARGE_LOCATION VARCHAR(50), -- There is NULL in this version
-            INSURANCE VARCHAR(255) NOT NULL,
-            LANGUAGE VARCHAR(10),
-            MARITAL_STATUS VARCHAR(50),
-            ETHNICITY VARCHAR(200) NOT NULL,
-            EDREGTIME TIMESTAMP(0),
-            EDOUTTIME TIMESTAMP(0),
-            HOSPITAL_EXPIRE_FLAG SMALLINT,
-            CONSTRAINT adm_hadm_pk PRIMARY KEY (HADM_ID),
-            CONSTRAINT adm_hadm_unique UNIQUE (HADM_ID)
+def __getByteRange(filePath):
 
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+    import re
 
-    import pandas as pd
-    import numpy as np
+    # A byte range of a file split by __splitFile is named <file>#<start>-<end>
+    match = re.fullmatch(r'(.*)#([0-9]+)-([0-9]+)', filePath)
+    if match is None:
+        return filePath, None, None
+    return match.group(1), int(match.group(2)), int(match.group(3))
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df.deathtime.replace({np.nan: None}, inplace=True)
-    df.edregtime.replace({np.nan: None}, inplace=True)
-    df.edouttime.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.admissions['column_mapping']['subject_id'],
-        Config.admissions['column_mapping']['hadm_id'],
-        Config.admissions['column_mapping']['admittime'],
-        Config.admissions['column_mapping']['dischtime'],
-        Config.admissions['column_mapping']['deathtime'],
-        Config.admissions['column_mapping']['admission_type'],
-        Config.admissions['column_mapping']['admission_location'],
-        Config.admissions['column_mapping']['discharge_location'],
-        Config.admissions['column_mapping']['insurance'],
-        Config.admissions['column_mapping']['language'],
-        Config.admissions['column_mapping']['marital_status'],
-        Config.admissions['column_mapping']['ethnicity'],
-        Config.admissions['column_mapping']['edregtime'],
-        Config.admissions['column_mapping']['edouttime'],
-        Config.admissions['column_mapping']['hospital_expire_flag'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='ADMISSIONS', df=df, dfColumns=dfColumns)
 
+def __getFileSize(filePath):
 
-def importTransfers(con, sourceSchemaName, filePath, fileSeparator):
+    import os
 
-    log.info("Creating table: " + sourceSchemaName + ".TRANSFERS")
+    filePath, start, end = __getByteRange(filePath)
+    return end - start if start is not None else os.path.getsize(filePath)
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.TRANSFERS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.TRANSFERS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT,
-            TRANSFER_ID INT NOT NULL,
-            EVENTTYPE VARCHAR(20) NOT NULL,
-            CAREUNIT VARCHAR(50),
-            INTIME TIMESTAMP(0),
-            OUTTIME TIMESTAMP(0),
-            CONSTRAINT transfers_subid_transid_pk PRIMARY KEY (SUBJECT_ID, TRANSFER_ID)
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
-    import numpy as np
+@contextlib.contextmanager
+def __openFile(filePath, partialRead=False):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df.intime.replace({np.nan: None}, inplace=True)
-    df.outtime.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.transfers['column_mapping']['subject_id'],
-        Config.transfers['column_mapping']['hadm_id'],
-        Config.transfers['column_mapping']['transfer_id'],
-        Config.transfers['column_mapping']['eventtype'],
-        Config.transfers['column_mapping']['careunit'],
-        Config.transfers['column_mapping']['intime'],
-        Config.transfers['column_mapping']['outtime'],
-        ]
-    df['hadm_id'] = df['hadm_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='TRANSFERS', df=df, dfColumns=dfColumns)
+    import gzip
+    import subprocess
 
+    # Compressed files are decompressed as they are read. By default this runs in a
+    # separate process (gzip -dc, zstd -dc, ...) writing to a pipe, so decompression
+    # overlaps with parsing.
+    filePath, start, end = __getByteRange(filePath)
+    command = __getDecompressCommand(filePath)
+    if start is not None:
+        with open(filePath, 'rb') as f:
+            f.seek(start)
+            yield io.BufferedReader(__FileRange(f, end - start), buffer_size=1024 * 1024)
+    elif command is not None:
+        process = subprocess.Popen(command + [filePath], stdout=subprocess.PIPE, bufsize=1024 * 1024)
+        try:
+            yield process.stdout
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            if partialRead:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+        if not partialRead and process.returncode != 0:
+            raise OSError("Decompressing file: " + filePath + " failed with exit code " + str(process.returncode))
+    elif filePath.endswith('.gz'):
+        with gzip.open(filePath, 'rb') as f:
+            yield f
+    elif filePath.endswith('.zst'):
+        import zstandard
 
-def importDiagnosesIcd(con, sourceSchemaName, filePath, fileSeparator):
+        with zstandard.open(filePath, 'rb') as f:
+            yield f
+    else:
+        with open(filePath, 'rb') as f:
+            yield f
 
-    log.info("Creating table: " + sourceSchemaName + ".DIAGNOSES_ICD")
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.DIAGNOSES_ICD CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.DIAGNOSES_ICD
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            SEQ_NUM INT NOT NULL,
-            ICD_CODE VARCHAR(10) NOT NULL,
-            ICD_VERSION INT NOT NULL
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+def __isParquetFile(filePath):
 
-    import pandas as pd
-    import numpy as np
+    return filePath.endswith('.parquet')
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.diagnoses_icd['column_mapping']['subject_id'],
-        Config.diagnoses_icd['column_mapping']['hadm_id'],
-        Config.diagnoses_icd['column_mapping']['seq_num'],
-        Config.diagnoses_icd['column_mapping']['icd_code'],
-        Config.diagnoses_icd['column_mapping']['icd_version'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='DIAGNOSES_ICD', df=df, dfColumns=dfColumns)
 
+def __getAverageRowBytes(filePath):
 
-def importServices(con, sourceSchemaName, filePath, fileSeparator):
+    # Parquet files record the uncompressed size and number of rows of each row group
+    if __isParquetFile(filePath):
+        import pyarrow.parquet
 
-    log.info("Creating table: " + sourceSchemaName + ".SERVICES")
+        metadata = pyarrow.parquet.ParquetFile(filePath).metadata
+        if metadata.num_rows > 0:
+            return sum(metadata.row_group(index).total_byte_size for index in range(metadata.num_row_groups)) / metadata.num_rows
+        return None
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.SERVICES CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.SERVICES
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            TRANSFERTIME TIMESTAMP(0) NOT NULL,
-            PREV_SERVICE VARCHAR(20) ,
-            CURR_SERVICE VARCHAR(20) NOT NULL
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+    # Average length of the rows in the first megabyte of the (decompressed) file
+    with __openFile(filePath, partialRead=True) as f:
+        f.readline()
+        sample = f.readlines(1024 * 1024)
+    if len(sample) > 0:
+        return sum(len(line) for line in sample) / len(sample)
+    return None
 
-    import pandas as pd
-    import numpy as np
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df.transfertime.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.services['column_mapping']['subject_id'],
-        Config.services['column_mapping']['hadm_id'],
-        Config.services['column_mapping']['transfertime'],
-        Config.services['column_mapping']['prev_service'],
-        Config.services['column_mapping']['curr_service'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='SERVICES', df=df, dfColumns=dfColumns)
+def __getChunkRows(filePath):
 
+    # A byte budget is converted to a number of rows using the average row length
+    if Config.import_chunk_bytes:
+        averageRowBytes = __getAverageRowBytes(filePath)
+        if averageRowBytes:
+            return max(1, int(Config.import_chunk_bytes / averageRowBytes))
+    return Config.import_chunk_rows
 
-def importLabEvents(con, sourceSchemaName, filePath, fileSeparator, createSchema=True):
 
-    log.info("Creating table: " + sourceSchemaName + ".LABEVENTS")
+def __getChunkBytes(filePath):
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.LABEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.LABEVENTS
-        (
-            LABEVENT_ID INT NOT NULL,
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT ,
-            SPECIMEN_ID INT NOT NULL,
-            ITEMID INT NOT NULL,
-            CHARTTIME TIMESTAMP NOT NULL,
-            STORETIME TIMESTAMP ,
-            VALUE VARCHAR(200) ,
-            VALUENUM DOUBLE PRECISION ,
-            VALUEUOM VARCHAR(20) ,
-            REF_RANGE_LOWER DOUBLE PRECISION ,
-            REF_RANGE_UPPER  DOUBLE PRECISION,
-            FLAG VARCHAR(10) ,
-            PRIORITY VARCHAR(7) ,
-            COMMENTS VARCHAR(620) ,
-            CONSTRAINT labevents_labeventid_pk PRIMARY KEY (LABEVENT_ID)
-        )
-        ;
-        """
-    if createSchema:
-        with con:
-            with con.cursor() as cursor:
-                cursor.execute(dropQuery)
-                cursor.execute(createQuery)
+    # A row budget is converted to a number of bytes using the average row length
+    if Config.import_chunk_bytes:
+        return Config.import_chunk_bytes
+    if Config.import_chunk_rows:
+        averageRowBytes = __getAverageRowBytes(filePath)
+        if averageRowBytes:
+            return max(1024 * 1024, int(Config.import_chunk_rows * averageRowBytes))
+    return None
+
+
+def __readColumnNames(filePath, fileSeparator):
 
     import pandas as pd
-    import numpy as np
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df['hadm_id'] = df['hadm_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['specimen_id'] = df['specimen_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['itemid'] = df['itemid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df.charttime.replace({np.nan: None}, inplace=True)
-    df.storetime.replace({np.nan: None}, inplace=True)
-
-    dfColumns = [
-        Config.labevents['column_mapping']['labevent_id'],
-        Config.labevents['column_mapping']['subject_id'],
-        Config.labevents['column_mapping']['hadm_id'],
-        Config.labevents['column_mapping']['specimen_id'],
-        Config.labevents['column_mapping']['itemid'],
-        Config.labevents['column_mapping']['charttime'],
-        Config.labevents['column_mapping']['storetime'],
-        Config.labevents['column_mapping']['value'],
-        Config.labevents['column_mapping']['valuenum'],
-        Config.labevents['column_mapping']['valueuom'],
-        Config.labevents['column_mapping']['ref_range_lower'],
-        Config.labevents['column_mapping']['ref_range_upper'],
-        Config.labevents['column_mapping']['flag'],
-        Config.labevents['column_mapping']['priority'],
-        Config.labevents['column_mapping']['comments'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='LABEVENTS', df=df, dfColumns=dfColumns)
+    if __isParquetFile(filePath):
+        import pyarrow.parquet
 
+        return pyarrow.parquet.read_schema(filePath).names
 
-def importLabItems(con, sourceSchemaName, filePath, fileSeparator):
+    with __openFile(filePath, partialRead=True) as f:
+        return list(pd.read_csv(f, sep=fileSeparator, nrows=0).columns)
 
-    log.info("Creating table: " + sourceSchemaName + ".D_LABITEMS")
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.D_LABITEMS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.D_LABITEMS
-        (
-            ITEMID INT NOT NULL,
-            LABEL VARCHAR(50),
-            FLUID VARCHAR(50) NOT NULL,
-            CATEGORY VARCHAR(50) NOT NULL,
-            LOINC_CODE VARCHAR(50),
-            CONSTRAINT d_labitems_itemid_pk PRIMARY KEY (ITEMID)
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+def __getColumnType(sqlType):
 
-    import pandas as pd
+    # Integer columns are read as integers and floating point columns as floats. Text
+    # and timestamps are kept as the text in the file, which the database parses when
+    # the rows are written.
+    baseType = sqlType.upper().split('(')[0].replace('NOT NULL', '').strip()
+    if baseType in ('SMALLINT', 'INT', 'INTEGER', 'BIGINT'):
+        return 'integer'
+    if baseType in ('REAL', 'FLOAT', 'DOUBLE PRECISION'):
+        return 'float'
+    return 'text'
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.d_labitems['column_mapping']['itemid'],
-        Config.d_labitems['column_mapping']['label'],
-        Config.d_labitems['column_mapping']['fluid'],
-        Config.d_labitems['column_mapping']['category'],
-        Config.d_labitems['column_mapping']['loinc_code'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='D_LABITEMS', df=df, dfColumns=dfColumns)
 
+def __getDtype(sqlType):
 
-def importProcedures(con, sourceSchemaName, filePath, fileSeparator):
+    return {'integer': 'Int64', 'float': 'float64', 'text': 'str'}[__getColumnType(sqlType)]
 
-    log.info("Creating table: " + sourceSchemaName + ".PROCEDURES_ICD")
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.PROCEDURES_ICD CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.PROCEDURES_ICD
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            SEQ_NUM INT NOT NULL,
-            CHARTDATE TIMESTAMP(0) NOT NULL,
-            ICD_CODE VARCHAR(10) NOT NULL,
-            ICD_VERSION INT NOT NULL
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+def __getArrowType(sqlType):
 
-    import pandas as pd
+    import pyarrow as pa
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.procedures_icd['column_mapping']['subject_id'],
-        Config.procedures_icd['column_mapping']['hadm_id'],
-        Config.procedures_icd['column_mapping']['seq_num'],
-        Config.procedures_icd['column_mapping']['chartdate'],
-        Config.procedures_icd['column_mapping']['icd_code'],
-        Config.procedures_icd['column_mapping']['icd_version'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='PROCEDURES_ICD', df=df, dfColumns=dfColumns)
+    return {'integer': pa.int64(), 'float': pa.float64(), 'text': pa.string()}[__getColumnType(sqlType)]
 
 
-def importHcpcsEvents(con, sourceSchemaName, filePath, fileSeparator):
+def __isArrowTable(df):
 
-    log.info("Creating table: " + sourceSchemaName + ".HCPCSEVENTS")
+    # Chunks read by the pyarrow engine are kept as pyarrow Tables
+    return type(df).__module__.startswith('pyarrow')
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.HCPCSEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.HCPCSEVENTS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            CHARTDATE TIMESTAMP(0) NOT NULL, -- new for 1.0
-            HCPCS_CD VARCHAR(5) NOT NULL,
-            SEQ_NUM INT NOT NULL,
-            SHORT_DESCRIPTION VARCHAR(170) NOT NULL
-            -- longest is 165
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
+def __readChunks(filePath, fileSeparator, table, columnNames=None):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.hcpcsevents['column_mapping']['subject_id'],
-        Config.hcpcsevents['column_mapping']['hadm_id'],
-        Config.hcpcsevents['column_mapping']['chartdate'],
-        Config.hcpcsevents['column_mapping']['hcpcs_cd'],
-        Config.hcpcsevents['column_mapping']['seq_num'],
-        Config.hcpcsevents['column_mapping']['short_description'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='HCPCSEVENTS', df=df, dfColumns=dfColumns)
+    # Parquet files are always read with pyarrow, whatever the reader engine
+    engine = table.get('reader_engine', Config.import_reader_engine)
+    if __isParquetFile(filePath):
+        chunks = __readParquetChunks(filePath=filePath, table=table)
+    elif engine == 'pandas':
+        chunks = __readCsvChunks(filePath=filePath, fileSeparator=fileSeparator, table=table, columnNames=columnNames)
+    elif engine == 'pyarrow':
+        chunks = __readArrowChunks(filePath=filePath, fileSeparator=fileSeparator, table=table, columnNames=columnNames)
+    else:
+        raise ValueError("Unknown reader engine: " + str(engine))
 
+    if len(table.get('parsed_columns', [])) > 0:
+        return (__parseValues(df=df, table=table) for df in chunks)
+    return chunks
 
-def importDrugCodes(con, sourceSchemaName, filePath, fileSeparator):
 
-    log.info("Creating table: " + sourceSchemaName + ".DRGCODES")
+def __readAheadChunks(chunks, depth):
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.DRGCODES CASCADE"""
-    createQuery = """CREATE TABLE  """ + sourceSchemaName + """.DRGCODES
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            DRG_TYPE VARCHAR(4) NOT NULL,
-            DRG_CODE VARCHAR(10) NOT NULL,
-            DESCRIPTION VARCHAR(195) ,
-            DRG_SEVERITY SMALLINT,
-            DRG_MORTALITY SMALLINT
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+    import queue
+    import threading
+
+    # The chunks are read by a separate thread, up to depth chunks ahead of the chunk
+    # being written. The parsers and the database driver release the GIL while they
+    # work, so that the next chunks are parsed while the database loads the last one.
+    chunkQueue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                chunkQueue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def readChunks():
+        try:
+            for df in chunks:
+                if not put(('chunk', df)):
+                    return
+            put(('done', None))
+        except BaseException as e:
+            put(('failed', e))
+        finally:
+            chunks.close()
+
+    reader = threading.Thread(target=readChunks, daemon=True)
+    reader.start()
+    try:
+        while True:
+            kind, value = chunkQueue.get()
+            if kind == 'failed':
+                raise value
+            if kind == 'done':
+                return
+            yield value
+    finally:
+        # Stops the reader when the writing ends early or fails
+        stopped.set()
+        reader.join()
+
+
+def __parseValues(df, table):
+
+    # The number (the first one in the text) and unit (when the text is a number
+    # followed by lower case letters, e.g. '12.5 mg') of each parsed column, as the
+    # ETL matched them with REGEXP_MATCH before. PostgreSQL's TRIM only removes
+    # spaces, and its $ only matches at the very end of the text.
+    for column in table['parsed_columns']:
+        if __isArrowTable(df):
+            import pyarrow as pa
+            import pyarrow.compute
+
+            values = df.column(column)
+            number = pyarrow.compute.struct_field(pyarrow.compute.extract_regex(values, r'(?P<number>-?[0-9]+\.?[0-9]*)'), [0])
+            unit = pyarrow.compute.struct_field(pyarrow.compute.extract_regex(pyarrow.compute.utf8_trim(values, characters=' '), r'^-?[0-9]+\.?[0-9]* *(?P<unit>[a-z]+)$'), [0])
+            df = df.append_column(column + '_parsed_num', number.cast(pa.float64()))
+            df = df.append_column(column + '_parsed_unit', unit)
+        else:
+            values = df[column]
+            df[column + '_parsed_num'] = values.str.extract(r'(-?[0-9]+\.?[0-9]*)', expand=False).astype('float64')
+            df[column + '_parsed_unit'] = values.str.strip(' ').str.extract(r'^-?[0-9]+\.?[0-9]* *([a-z]+)\Z', expand=False)
+    return df
+
+
+def __readCsvChunks(filePath, fileSeparator, table, columnNames=None):
 
     import pandas as pd
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df['drg_severity'] = df['drg_severity'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['drg_mortality'] = df['drg_mortality'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    dfColumns = [
-        Config.drgcodes['column_mapping']['subject_id'],
-        Config.drgcodes['column_mapping']['hadm_id'],
-        Config.drgcodes['column_mapping']['drg_type'],
-        Config.drgcodes['column_mapping']['drg_code'],
-        Config.drgcodes['column_mapping']['description'],
-        Config.drgcodes['column_mapping']['drg_severity'],
-        Config.drgcodes['column_mapping']['drg_mortality'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='DRGCODES', df=df, dfColumns=dfColumns)
+    # Only the mapped columns are read, with the types given in the table definition,
+    # and renamed to the standard column names.
+    columnMapping = table['column_mapping']
+    readOptions = {
+        'usecols': list(columnMapping.values()),
+        'dtype': {fileColumn: __getDtype(table['columns'][column]) for column, fileColumn in columnMapping.items()},
+        }
+    renameColumns = {fileColumn: column for column, fileColumn in columnMapping.items()}
+
+    # Parts of a file cut with split (xab, xac, ...) have no header of their own; they
+    # are read with the column names taken from the header of the first part.
+    if columnNames is not None and __readColumnNames(filePath=filePath, fileSeparator=fileSeparator) != columnNames:
+        readOptions.update({'header': None, 'names': columnNames})
+
+    chunkRows = __getChunkRows(filePath)
+    with __openFile(filePath) as f:
+        if chunkRows:
+            log.info("Reading file: " + str(filePath) + " in chunks of " + str(chunkRows) + " rows")
+            for df in pd.read_csv(f, sep=fileSeparator, chunksize=chunkRows, **readOptions):
+                yield df.rename(columns=renameColumns)
+        else:
+            log.info("Reading file: " + str(filePath))
+            yield pd.read_csv(f, sep=fileSeparator, **readOptions).rename(columns=renameColumns)
+
+
+def __readArrowChunks(filePath, fileSeparator, table, columnNames=None):
+
+    import pyarrow.csv
+
+    # The file is parsed by pyarrow on multiple threads into typed columns. The chunks
+    # are pyarrow Tables, which are written without converting the values to Python
+    # objects.
+    columnMapping = table['column_mapping']
+    readOptions = pyarrow.csv.ReadOptions()
+    # Free text such as the LABEVENTS comments may hold quoted line breaks
+    parseOptions = pyarrow.csv.ParseOptions(delimiter=fileSeparator, newlines_in_values=True)
+    convertOptions = pyarrow.csv.ConvertOptions(
+        include_columns=list(columnMapping.values()),
+        column_types={fileColumn: __getArrowType(table['columns'][column]) for column, fileColumn in columnMapping.items()},
+        strings_can_be_null=True,
+        )
+    renameColumns = {fileColumn: column for column, fileColumn in columnMapping.items()}
+
+    if columnNames is not None and __readColumnNames(filePath=filePath, fileSeparator=fileSeparator) != columnNames:
+        readOptions.column_names = columnNames
+
+    chunkBytes = __getChunkBytes(filePath)
+    with __openFile(filePath) as f:
+        if chunkBytes:
+            log.info("Reading file: " + str(filePath) + " in chunks of " + str(chunkBytes) + " bytes")
+            readOptions.block_size = min(chunkBytes, 2 ** 30)
+            reader = pyarrow.csv.open_csv(f, read_options=readOptions, parse_options=parseOptions, convert_options=convertOptions)
+            for batch in reader:
+                df = pyarrow.Table.from_batches([batch])
+                yield df.rename_columns([renameColumns[name] for name in df.column_names])
+        else:
+            log.info("Reading file: " + str(filePath))
+            df = pyarrow.csv.read_csv(f, read_options=readOptions, parse_options=parseOptions, convert_options=convertOptions)
+            yield df.rename_columns([renameColumns[name] for name in df.column_names])
+
+
+def __castParquetColumn(column, sqlType):
+
+    import pyarrow as pa
+    import pyarrow.compute
+
+    # Dates and timestamps stored as such in the Parquet file are turned into the text
+    # the CSV files hold, so that they are written and compared with the watermark the
+    # same way.
+    if __getColumnType(sqlType) == 'text' and pa.types.is_timestamp(column.type):
+        column = column.cast(pa.timestamp('s', tz=column.type.tz), safe=False)
+        return pyarrow.compute.strftime(column, format='%Y-%m-%d %H:%M:%S')
+    if __getColumnType(sqlType) == 'text' and pa.types.is_date(column.type):
+        return pyarrow.compute.strftime(column, format='%Y-%m-%d')
+    return column.cast(__getArrowType(sqlType))
+
+
+def __readParquetChunks(filePath, table):
+
+    import pyarrow
+    import pyarrow.parquet
+
+    # The file is read one row group at a time (split into batches of the chunk size),
+    # and only the mapped columns are read. The chunks are pyarrow Tables with the
+    # types given in the table definition, like those of the pyarrow CSV reader.
+    columnMapping = table['column_mapping']
+    parquetFile = pyarrow.parquet.ParquetFile(filePath)
+
+    def toTable(batch):
+        return pyarrow.Table.from_arrays(
+            [__castParquetColumn(column=batch.column(fileColumn), sqlType=table['columns'][column]) for column, fileColumn in columnMapping.items()],
+            names=list(columnMapping.keys())
+            )
+
+    chunkRows = __getChunkRows(filePath)
+    if chunkRows:
+        log.info("Reading file: " + str(filePath) + " in chunks of " + str(chunkRows) + " rows")
+        for batch in parquetFile.iter_batches(batch_size=chunkRows, columns=list(columnMapping.values())):
+            yield toTable(batch)
+    else:
+        log.info("Reading file: " + str(filePath) + " by row group")
+        for index in range(parquetFile.num_row_groups):
+            yield toTable(parquetFile.read_row_group(index, columns=list(columnMapping.values())))
+
+
+def __getConnection():
+
+    import psycopg2
+
+    return psycopg2.connect(
+        dbname=Config.sql_db_name,
+        user=Config.sql_user_name,
+        host=Config.sql_host_name,
+        port=Config.sql_port_number,
+        password=Config.sql_password
+        )
 
 
-def importPrescriptions(con, sourceSchemaName, filePath, fileSeparator):
+def __getFilePaths(fileName):
 
-    log.info("Creating table: " + sourceSchemaName + ".PRESCRIPTIONS")
+    import glob
+    import os
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.PRESCRIPTIONS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.PRESCRIPTIONS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            PHARMACY_ID INT NOT NULL,
-            STARTTIME TIMESTAMP(0) ,
-            STOPTIME TIMESTAMP(0) ,
-            DRUG_TYPE VARCHAR(10) NOT NULL,
-            DRUG VARCHAR(100) ,
-            GSN VARCHAR(250) , -- exceeds 10
-            NDC VARCHAR(20) ,
-            PROD_STRENGTH VARCHAR(120) ,
-            FORM_RX  VARCHAR(10),
-            DOSE_VAL_RX VARCHAR(50) ,
-            DOSE_UNIT_RX VARCHAR(50) ,
-            FORM_VAL_DISP VARCHAR(30) ,
-            FORM_UNIT_DISP VARCHAR(30) ,
-            DOSES_PER_24_HRS DOUBLE PRECISION ,
-            ROUTE VARCHAR(30)
+    # file_name may be a single file, a list of files, a glob pattern or a directory
+    # of Parquet files (searched recursively, e.g. a partitioned dataset)
+    if isinstance(fileName, (list, tuple)):
+        return list(fileName)
+    if os.path.isdir(fileName):
+        filePaths = sorted(glob.glob(os.path.join(fileName, '**', '*.parquet'), recursive=True))
+        if len(filePaths) == 0:
+            raise FileNotFoundError("No Parquet files in: " + fileName)
+        return filePaths
+    if glob.has_magic(fileName):
+        filePaths = sorted(glob.glob(fileName))
+        if len(filePaths) == 0:
+            raise FileNotFoundError("No files match: " + fileName)
+        return filePaths
+    return [fileName]
 
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
-    import numpy as np
+def __isPlainFile(filePath):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df.stoptime.replace({np.nan: None}, inplace=True)
-    df.starttime.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.prescriptions['column_mapping']['subject_id'],
-        Config.prescriptions['column_mapping']['hadm_id'],
-        Config.prescriptions['column_mapping']['pharmacy_id'],
-        Config.prescriptions['column_mapping']['starttime'],
-        Config.prescriptions['column_mapping']['stoptime'],
-        Config.prescriptions['column_mapping']['drug_type'],
-        Config.prescriptions['column_mapping']['drug'],
-        Config.prescriptions['column_mapping']['gsn'],
-        Config.prescriptions['column_mapping']['ndc'],
-        Config.prescriptions['column_mapping']['prod_strength'],
-        Config.prescriptions['column_mapping']['form_rx'],
-        Config.prescriptions['column_mapping']['dose_val_rx'],
-        Config.prescriptions['column_mapping']['dose_unit_rx'],
-        Config.prescriptions['column_mapping']['form_val_disp'],
-        Config.prescriptions['column_mapping']['form_unit_disp'],
-        Config.prescriptions['column_mapping']['doses_per_24_hrs'],
-        Config.prescriptions['column_mapping']['route'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='PRESCRIPTIONS', df=df, dfColumns=dfColumns)
+    # Compressed and Parquet files can only be read from the start
+    return not filePath.endswith(('.parquet', '.gz', '.zst')) and __getDecompressCommand(filePath) is None
 
 
-def importMicrobiologyEvents(con, sourceSchemaName, filePath, fileSeparator):
+def __isServerCopyFile(filePath):
 
-    log.info("Creating table: " + sourceSchemaName + ".MICROBIOLOGYEVENTS")
+    # Compressed and Parquet files, and byte ranges of files, have to be read here
+    return __isPlainFile(filePath) and __getByteRange(filePath)[1] is None
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.MICROBIOLOGYEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.MICROBIOLOGYEVENTS
-        (
-            MICROEVENT_ID INT NOT NULL,
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT ,
-            MICRO_SPECIMEN_ID INT NOT NULL,
-            CHARTDATE TIMESTAMP(0) NOT NULL,
-            CHARTTIME TIMESTAMP(0) ,
-            SPEC_ITEMID INT NOT NULL,
-            SPEC_TYPE_DESC VARCHAR(100) NOT NULL,
-            TEST_SEQ INT NOT NULL,
-            STOREDATE TIMESTAMP(0) ,
-            STORETIME TIMESTAMP(0) ,
-            TEST_ITEMID INT NOT NULL,
-            TEST_NAME VARCHAR(100) NOT NULL,
-            ORG_ITEMID INT ,
-            ORG_NAME VARCHAR(100) ,
-            ISOLATE_NUM SMALLINT ,
-            QUANTITY VARCHAR(50) ,
-            AB_ITEMID INT ,
-            AB_NAME VARCHAR(30) ,
-            DILUTION_TEXT VARCHAR(10) ,
-            DILUTION_COMPARISON VARCHAR(20) ,
-            DILUTION_VALUE DOUBLE PRECISION ,
-            INTERPRETATION VARCHAR(5) ,
-            COMMENTS VARCHAR(750),
-            CONSTRAINT mbe_microevent_id_pk PRIMARY KEY (MICROEVENT_ID)
-        )
-        ;
+
+def __isSplitFile(filePath):
+
+    import os
+
+    return bool(Config.import_split_bytes) and Config.import_file_workers > 1 and __isPlainFile(filePath) and os.path.getsize(filePath) > Config.import_split_bytes
+
+
+def __splitFile(filePath):
+
+    import mmap
+    import os
+    import numpy as np
+
+    # The records of a CSV file end at the line breaks outside quoted fields, which are
+    # those preceded by an even number of quotes (an escaped quote "" counts twice).
+    # The file is scanned once through a memory map, counting the quotes block by
+    # block, and cut at the first record boundary after every import_split_bytes.
+    fileSize = os.path.getsize(filePath)
+    blockBytes = 64 * 1024 * 1024
+    boundaries = [0]
+    target = Config.import_split_bytes
+    quotes = 0
+    with open(filePath, 'rb') as f:
+        data = np.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+    for blockStart in range(0, fileSize, blockBytes):
+        block = data[blockStart:blockStart + blockBytes]
+        quotePositions = None
+        while target < blockStart + len(block):
+            if quotePositions is None:
+                quotePositions = np.flatnonzero(block == ord('"'))
+            searchStart = max(target, blockStart) - blockStart
+            lineBreaks = np.flatnonzero(block[searchStart:] == ord('\n')) + searchStart
+            outsideQuotes = (quotes + np.searchsorted(quotePositions, lineBreaks)) % 2 == 0
+            if not outsideQuotes.any():
+                break
+            boundary = blockStart + int(lineBreaks[outsideQuotes][0]) + 1
+            if boundary < fileSize:
+                boundaries.append(boundary)
+            target = boundary + Config.import_split_bytes
+        quotes += len(quotePositions) if quotePositions is not None else int(np.count_nonzero(block == ord('"')))
+    boundaries.append(fileSize)
+
+    log.info("Splitting file: " + filePath + " into " + str(len(boundaries) - 1) + " byte ranges")
+    return [filePath + '#' + str(start) + '-' + str(end) for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+
+def __splitFiles(filePaths):
+
+    # Large CSV files are imported in byte ranges by the file workers, as if they were
+    # parts of the file cut with split
+    return [part for filePath in filePaths for part in (__splitFile(filePath) if __isSplitFile(filePath) else [filePath])]
+
+
+def __serverCopyFile(con, sourceSchemaName, table, filePath, fileSeparator, fileHash, columnNames=None):
+
+    import os
+    import time
+    import psycopg2.errors
+
+    if len(table.get('parsed_columns', [])) > 0:
+        log.info("File: " + str(filePath) + " has values parsed on import, streaming it from the client")
+        return None
+
+    # The server can only copy every column of the file, in the order of the file
+    fileColumns = __readColumnNames(filePath=filePath, fileSeparator=fileSeparator)
+    header = columnNames is None or fileColumns == columnNames
+    if not header:
+        fileColumns = columnNames
+    renameColumns = {fileColumn: column for column, fileColumn in table['column_mapping'].items()}
+    if sorted(fileColumns) != sorted(renameColumns.keys()):
+        log.info("File: " + str(filePath) + " has columns that are not imported, streaming it from the client")
+        return None
+
+    copyQuery = """COPY """ + sourceSchemaName + """.""" + table['table_name'] + """ (""" + ", ".join([renameColumns[fileColumn] for fileColumn in fileColumns]) + """)
+        FROM %s WITH (FORMAT csv, HEADER %s, DELIMITER %s)
         """
+    metrics = __newMetrics(tableName=table['table_name'], filePath=filePath)
+    metrics['bytes_read'] = __getFileSize(filePath)
+    start = time.perf_counter()
+    try:
+        with con:
+            with con.cursor() as cursor:
+                log.info("Copying file: " + str(filePath) + " on the database server")
+                cursor.execute(copyQuery, (os.path.abspath(filePath), header, fileSeparator))
+                rows = cursor.rowcount
+                # The rows copied by the server are not seen, so the watermark is the
+                # largest value of the table (the file is loaded in full)
+                watermarkValue = None
+                if table.get('watermark_column') is not None:
+                    cursor.execute("""SELECT MAX(""" + table['watermark_column'].upper() + """)::TEXT FROM """ + sourceSchemaName + """.""" + table['table_name'])
+                    watermarkValue = cursor.fetchone()[0]
+            __saveProgress(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileHash=fileHash, chunkNumber=1, rows=rows, loadedRows=rows, completed=True, watermarkValue=watermarkValue)
+    except (psycopg2.errors.InsufficientPrivilege, psycopg2.errors.UndefinedFile) as e:
+        log.info("Database server cannot read file: " + str(filePath) + " (" + str(e).splitlines()[0] + "), streaming it from the client")
+        return None
+    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+        if not Config.import_reject_rows:
+            raise
+        log.info("Database server cannot copy file: " + str(filePath) + " (" + str(e).splitlines()[0] + "), streaming it from the client to set aside the failing rows")
+        return None
+    metrics['rows_read'] = metrics['rows_written'] = rows
+    metrics['write_seconds'] = metrics['total_seconds'] = time.perf_counter() - start
+    log.info(__formatMetrics(metrics))
+    return metrics
+
+
+def __loadFile(con, sourceSchemaName, table, filePath, fileSeparator, fileHash, columnNames=None, watermarkValue=None, progress=None):
+
+    import time
+    import psutil
+
+    sampled = __isSampledTable(table)
+    sampleSubjects = __getSampleSubjects() if sampled and Config.import_sample_subjects is not None else None
+
+    # A file needing no filtering is copied by the database server when it can read it
+    if Config.import_server_copy and watermarkValue is None and not sampled and progress is None and __isServerCopyFile(filePath):
+        metrics = __serverCopyFile(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileSeparator=fileSeparator, fileHash=fileHash, columnNames=columnNames)
+        if metrics is not None:
+            return metrics
+
+    # Each chunk is committed together with the number of rows of the file read so far,
+    # so that an interrupted import can skip the rows already loaded, and the number of
+    # rows written or rejected, which the rows in the table are checked against
+    chunkNumber, skipRows, fileWatermark, loadedRows = (progress[0], progress[1], progress[3], progress[4]) if progress is not None else (0, 0, None, 0)
+    if skipRows > 0:
+        log.info("Resuming file: " + str(filePath) + " after " + str(skipRows) + " rows")
+
+    process = psutil.Process()
+    metrics = __newMetrics(tableName=table['table_name'], filePath=filePath)
+    metrics['bytes_read'] = __getFileSize(filePath)
+    metrics['peak_rss_bytes'] = process.memory_info().rss
+
+    rows = 0
+    chunks = __readChunks(filePath=filePath, fileSeparator=fileSeparator, table=table, columnNames=columnNames)
+    if Config.import_read_ahead_chunks > 0:
+        chunks = __readAheadChunks(chunks=chunks, depth=Config.import_read_ahead_chunks)
+    try:
+        while True:
+            parseStart = time.perf_counter()
+            df = next(chunks, None)
+            metrics['parse_seconds'] += time.perf_counter() - parseStart
+            if df is None:
+                break
+            metrics['rows_read'] += len(df)
+            metrics['peak_rss_bytes'] = max(metrics['peak_rss_bytes'], process.memory_info().rss)
+            if rows + len(df) <= skipRows:
+                rows += len(df)
+                continue
+            if rows < skipRows:
+                df = df.slice(skipRows - rows) if __isArrowTable(df) else df.iloc[skipRows - rows:]
+                rows = skipRows
+            rows += len(df)
+            chunkNumber += 1
+            if watermarkValue is not None:
+                df = __filterWatermark(df=df, table=table, watermarkValue=watermarkValue)
+            if sampled:
+                df = __filterSample(df=df, sampleSubjects=sampleSubjects)
+            if table.get('watermark_column') is not None:
+                fileWatermark = __maxWatermark(table=table, watermarkValues=[fileWatermark, __getChunkWatermark(df=df, table=table)])
+            loadedRows += len(df)
+            writeStart = time.perf_counter()
+            with con:
+                rejectedRows = __saveTableDataframe(con=con, sourceSchemaName=sourceSchemaName, table=table, df=df, filePath=filePath)
+                __saveProgress(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileHash=fileHash, chunkNumber=chunkNumber, rows=rows, loadedRows=loadedRows, completed=False, watermarkValue=fileWatermark)
+            metrics['write_seconds'] += time.perf_counter() - writeStart
+            metrics['rows_written'] += len(df) - rejectedRows
+            metrics['rows_rejected'] += rejectedRows
+    finally:
+        chunks.close()
     with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+        __saveProgress(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileHash=fileHash, chunkNumber=chunkNumber, rows=rows, loadedRows=loadedRows, completed=True, watermarkValue=fileWatermark)
 
-    import pandas as pd
-    import numpy as np
+    metrics['total_seconds'] = metrics['parse_seconds'] + metrics['write_seconds']
+    log.info(__formatMetrics(metrics))
+    return metrics
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df['hadm_id'] = df['hadm_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['org_itemid'] = df['org_itemid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['ab_itemid'] = df['ab_itemid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['isolate_num'] = df['isolate_num'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df.chartdate.replace({np.nan: None}, inplace=True)
-    df.charttime.replace({np.nan: None}, inplace=True)
-    df.storedate.replace({np.nan: None}, inplace=True)
-    df.storetime.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.microbiologyevents['column_mapping']['microevent_id'],
-        Config.microbiologyevents['column_mapping']['subject_id'],
-        Config.microbiologyevents['column_mapping']['hadm_id'],
-        Config.microbiologyevents['column_mapping']['micro_specimen_id'],
-        Config.microbiologyevents['column_mapping']['chartdate'],
-        Config.microbiologyevents['column_mapping']['charttime'],
-        Config.microbiologyevents['column_mapping']['spec_itemid'],
-        Config.microbiologyevents['column_mapping']['spec_type_desc'],
-        Config.microbiologyevents['column_mapping']['test_seq'],
-        Config.microbiologyevents['column_mapping']['storedate'],
-        Config.microbiologyevents['column_mapping']['storetime'],
-        Config.microbiologyevents['column_mapping']['test_itemid'],
-        Config.microbiologyevents['column_mapping']['test_name'],
-        Config.microbiologyevents['column_mapping']['org_itemid'],
-        Config.microbiologyevents['column_mapping']['org_name'],
-        Config.microbiologyevents['column_mapping']['isolate_num'],
-        Config.microbiologyevents['column_mapping']['quantity'],
-        Config.microbiologyevents['column_mapping']['ab_itemid'],
-        Config.microbiologyevents['column_mapping']['ab_name'],
-        Config.microbiologyevents['column_mapping']['dilution_text'],
-        Config.microbiologyevents['column_mapping']['dilution_comparison'],
-        Config.microbiologyevents['column_mapping']['dilution_value'],
-        Config.microbiologyevents['column_mapping']['interpretation'],
-        Config.microbiologyevents['column_mapping']['comments'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='MICROBIOLOGYEVENTS', df=df, dfColumns=dfColumns)
 
+def __loadFileWorker(sourceSchemaName, table, filePath, fileSeparator, fileHash, columnNames, watermarkValue, progress):
 
-def importMicrobiologyItems(con, destinationSchemaName, filePath, fileSeparator):
-    pass
+    con = __getConnection()
+    try:
+        return __loadFile(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileSeparator=fileSeparator, fileHash=fileHash, columnNames=columnNames, watermarkValue=watermarkValue, progress=progress)
+    finally:
+        con.close()
 
 
-def importPharmacy(con, sourceSchemaName, filePath, fileSeparator):
+def __loadFiles(con, sourceSchemaName, table, filePaths, fileSeparator, fileHash, watermarkValue=None, progress={}):
 
-    log.info("Creating table: " + sourceSchemaName + ".PHARMACY")
+    columnNames = __readColumnNames(filePath=filePaths[0], fileSeparator=fileSeparator)
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.PHARMACY CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.PHARMACY
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            PHARMACY_ID INT NOT NULL,
-            POE_ID VARCHAR(25) ,
-            STARTTIME TIMESTAMP(0) ,
-            STOPTIME TIMESTAMP(0) ,
-            MEDICATION VARCHAR(100) ,
-            PROC_TYPE VARCHAR(50) NOT NULL,
-            STATUS VARCHAR(50) NOT NULL,
-            ENTERTIME TIMESTAMP(0) NOT NULL,
-            VERIFIEDTIME TIMESTAMP(0) ,
-            ROUTE VARCHAR(30),
-            FREQUENCY VARCHAR(30) ,
-            DISP_SCHED VARCHAR(100) ,
-            INFUSION_TYPE VARCHAR(15) ,
-            SLIDING_SCALE VARCHAR(5) ,
-            LOCKOUT_INTERVAL VARCHAR(50) ,
-            BASAL_RATE  DOUBLE PRECISION,
-            ONE_HR_MAX  VARCHAR(30), 
-            DOSES_PER_24_HRS DOUBLE PRECISION ,
-            DURATION DOUBLE PRECISION,
-            DURATION_INTERVAL VARCHAR(50) ,
-            EXPIRATION_VALUE INT ,
-            EXPIRATION_UNIT VARCHAR(50) ,
-            EXPIRATIONDATE TIMESTAMP(0) ,
-            DISPENSATION VARCHAR(50) ,
-            FILL_QUANTITY VARCHAR(30),
-            CONSTRAINT pharmacy_pharmacy_pk PRIMARY KEY (PHARMACY_ID)
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
+    # Files loaded completely by an interrupted import are skipped
+    filePaths = [filePath for filePath in filePaths if not (filePath in progress and progress[filePath][2])]
 
-    import pandas as pd
-    import numpy as np
+    if len(filePaths) > 1 and Config.import_file_workers > 1:
+        import multiprocessing
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df['subject_id'] = df['subject_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['hadm_id'] = df['hadm_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['pharmacy_id'] = df['pharmacy_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['expiration_value'] = df['expiration_value'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df.starttime.replace({np.nan: None}, inplace=True)
-    df.stoptime.replace({np.nan: None}, inplace=True)
-    df.entertime.replace({np.nan: None}, inplace=True)
-    df.verifiedtime.replace({np.nan: None}, inplace=True)
-    df.expirationdate.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.pharmacy['column_mapping']['subject_id'],
-        Config.pharmacy['column_mapping']['hadm_id'],
-        Config.pharmacy['column_mapping']['pharmacy_id'],
-        Config.pharmacy['column_mapping']['poe_id'],
-        Config.pharmacy['column_mapping']['starttime'],
-        Config.pharmacy['column_mapping']['stoptime'],
-        Config.pharmacy['column_mapping']['medication'],
-        Config.pharmacy['column_mapping']['proc_type'],
-        Config.pharmacy['column_mapping']['status'],
-        Config.pharmacy['column_mapping']['entertime'],
-        Config.pharmacy['column_mapping']['verifiedtime'],
-        Config.pharmacy['column_mapping']['route'],
-        Config.pharmacy['column_mapping']['frequency'],
-        Config.pharmacy['column_mapping']['disp_sched'],
-        Config.pharmacy['column_mapping']['infusion_type'],
-        Config.pharmacy['column_mapping']['sliding_scale'],
-        Config.pharmacy['column_mapping']['lockout_interval'],
-        Config.pharmacy['column_mapping']['basal_rate'],
-        Config.pharmacy['column_mapping']['one_hr_max'],
-        Config.pharmacy['column_mapping']['doses_per_24_hrs'],
-        Config.pharmacy['column_mapping']['duration'],
-        Config.pharmacy['column_mapping']['duration_interval'],
-        Config.pharmacy['column_mapping']['expiration_value'],
-        Config.pharmacy['column_mapping']['expiration_unit'],
-        Config.pharmacy['column_mapping']['expirationdate'],
-        Config.pharmacy['column_mapping']['dispensation'],
-        Config.pharmacy['column_mapping']['fill_quantity'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='PHARMACY', df=df, dfColumns=dfColumns)
+        workers = min(Config.import_file_workers, len(filePaths))
+        log.info("Importing " + str(len(filePaths)) + " files using " + str(workers) + " worker processes")
+        with multiprocessing.Pool(processes=workers) as pool:
+            return pool.starmap(
+                __loadFileWorker,
+                [(sourceSchemaName, table, filePath, fileSeparator, fileHash, columnNames, watermarkValue, progress.get(filePath)) for filePath in filePaths],
+                chunksize=1
+                )
+    else:
+        return [
+            __loadFile(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, fileSeparator=fileSeparator, fileHash=fileHash, columnNames=columnNames, watermarkValue=watermarkValue, progress=progress.get(filePath))
+            for filePath in filePaths
+            ]
 
 
-def importProcedureEvents(con, sourceSchemaName, filePath, fileSeparator):
+def __getPartitionMethod(table):
 
-    log.info("Creating table: " + sourceSchemaName + ".PROCEDUREEVENTS")
+    # 'hash' for the tables hash partitioned on their hash_partition_column (which
+    # replaces their partition_column), import_partitioning for the tables with a
+    # partition_column, and None for the tables that are not partitioned
+    if Config.import_hash_partitions and table.get('hash_partition_column') is not None:
+        return 'hash'
+    if table.get('partition_column') is not None:
+        return Config.import_partitioning
+    return None
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.PROCEDUREEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.PROCEDUREEVENTS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            STAY_ID INT NOT NULL,
-            STARTTIME TIMESTAMP(0) NOT NULL,
-            ENDTIME TIMESTAMP(0) NOT NULL,
-            STORETIME TIMESTAMP(0) NOT NULL,
-            ITEMID INT NOT NULL,
-            VALUE DOUBLE PRECISION NOT NULL,
-            VALUEUOM VARCHAR(30) NOT NULL,
-            LOCATION VARCHAR(30),
-            LOCATIONCATEGORY VARCHAR(30),
-            ORDERID INT NOT NULL,
-            LINKORDERID INT NOT NULL,
-            ORDERCATEGORYNAME VARCHAR(100) NOT NULL,
-            SECONDARYORDERCATEGORYNAME VARCHAR(100),
-            ORDERCATEGORYDESCRIPTION VARCHAR(50) NOT NULL,
-            PATIENTWEIGHT DOUBLE PRECISION NOT NULL,
-            TOTALAMOUNT DOUBLE PRECISION,
-            TOTALAMOUNTUOM VARCHAR(50),
-            ISOPENBAG SMALLINT NOT NULL,
-            CONTINUEINNEXTDEPT SMALLINT NOT NULL,
-            CANCELREASON SMALLINT NOT NULL,
-            STATUSDESCRIPTION VARCHAR(30) NOT NULL,
-            COMMENTS_DATE TIMESTAMP(0),
-            ORIGINALAMOUNT DOUBLE PRECISION NOT NULL,
-            ORIGINALRATE DOUBLE PRECISION NOT NULL
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
-    import numpy as np
+def __getHashPartitions(table):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    df['hadm_id'] = df['hadm_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['stay_id'] = df['stay_id'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['itemid'] = df['itemid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['orderid'] = df['orderid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df['linkorderid'] = df['linkorderid'].astype('Int64').fillna(0).astype('int').replace({0: None})
-    df.starttime.replace({np.nan: None}, inplace=True)
-    df.endtime.replace({np.nan: None}, inplace=True)
-    df.storetime.replace({np.nan: None}, inplace=True)
-    df.comments_date.replace({np.nan: None}, inplace=True)
-    dfColumns = [
-        Config.procedureevents['column_mapping']['subject_id'],
-        Config.procedureevents['column_mapping']['hadm_id'],
-        Config.procedureevents['column_mapping']['stay_id'],
-        Config.procedureevents['column_mapping']['starttime'],
-        Config.procedureevents['column_mapping']['endtime'],
-        Config.procedureevents['column_mapping']['storetime'],
-        Config.procedureevents['column_mapping']['itemid'],
-        Config.procedureevents['column_mapping']['value'],
-        Config.procedureevents['column_mapping']['valueuom'],
-        Config.procedureevents['column_mapping']['location'],
-        Config.procedureevents['column_mapping']['locationcategory'],
-        Config.procedureevents['column_mapping']['orderid'],
-        Config.procedureevents['column_mapping']['linkorderid'],
-        Config.procedureevents['column_mapping']['ordercategoryname'],
-        Config.procedureevents['column_mapping']['secondaryordercategoryname'],
-        Config.procedureevents['column_mapping']['ordercategorydescription'],
-        Config.procedureevents['column_mapping']['patientweight'],
-        Config.procedureevents['column_mapping']['totalamount'],
-        Config.procedureevents['column_mapping']['totalamountuom'],
-        Config.procedureevents['column_mapping']['isopenbag'],
-        Config.procedureevents['column_mapping']['continueinnextdept'],
-        Config.procedureevents['column_mapping']['cancelreason'],
-        Config.procedureevents['column_mapping']['statusdescription'],
-        Config.procedureevents['column_mapping']['comments_date'],
-        Config.procedureevents['column_mapping']['originalamount'],
-        Config.procedureevents['column_mapping']['originalrate'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='PROCEDUREEVENTS', df=df, dfColumns=dfColumns)
+    return [table['table_name'] + '_' + str(remainder) for remainder in range(Config.import_hash_partitions)]
 
 
-def importItems(con, sourceSchemaName, filePath, fileSeparator):
+def __getPrimaryKey(table):
 
-    log.info("Creating table: " + sourceSchemaName + ".D_ITEMS")
+    # The key of a partitioned table has to include the hash partitioning column
+    primaryKey = list(table.get('primary_key', []))
+    if len(primaryKey) > 0 and __getPartitionMethod(table) == 'hash' and table['hash_partition_column'] not in primaryKey:
+        primaryKey.append(table['hash_partition_column'])
+    return primaryKey
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.D_ITEMS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.D_ITEMS
-        (
-            ITEMID INT NOT NULL,
-            LABEL VARCHAR(200) NOT NULL,
-            ABBREVIATION VARCHAR(100) NOT NULL,
-            LINKSTO VARCHAR(50) NOT NULL,
-            CATEGORY VARCHAR(100) NOT NULL,
-            UNITNAME VARCHAR(100),
-            PARAM_TYPE VARCHAR(30) NOT NULL,
-            LOWNORMALVALUE DOUBLE PRECISION,
-            HIGHNORMALVALUE DOUBLE PRECISION,
-            CONSTRAINT ditems_itemid_unique UNIQUE (ITEMID),
-            CONSTRAINT ditems_itemid_pk PRIMARY KEY (ITEMID)
-        )
-        ;
-        """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
-    import numpy as np
+def __getPartitions(table):
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.d_items['column_mapping']['itemid'],
-        Config.d_items['column_mapping']['label'],
-        Config.d_items['column_mapping']['abbreviation'],
-        Config.d_items['column_mapping']['linksto'],
-        Config.d_items['column_mapping']['category'],
-        Config.d_items['column_mapping']['unitname'],
-        Config.d_items['column_mapping']['param_type'],
-        Config.d_items['column_mapping']['lownormalvalue'],
-        Config.d_items['column_mapping']['highnormalvalue'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='D_ITEMS', df=df, dfColumns=dfColumns)
+    # Partition n holds the values from the n-th bound up to the next bound; the values
+    # outside the bounds go to the default partition
+    tableName = table['table_name']
+    bounds = table['partition_bounds']
+    return [(tableName + '_' + str(number), bounds[number - 1], bounds[number]) for number in range(1, len(bounds))]
 
 
-def importDatetimeEvents(con, sourceSchemaName, filePath, fileSeparator):
+def __getDefaultPartition(table):
 
-    log.info("Creating table: " + sourceSchemaName + ".DATETIMEEVENTS")
+    return table['table_name'] + '_DEFAULT'
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.DATETIMEEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.DATETIMEEVENTS
+
+def __sliceDataframe(df, start, stop):
+
+    return df.slice(start, stop - start) if __isArrowTable(df) else df.iloc[start:stop]
+
+
+def __saveRejectingDataframe(con, sourceSchemaName, table, filePath, destinationTableName, df, dfColumns):
+
+    import psycopg2
+
+    # The rows are written as a whole if they can be. When the database rejects them
+    # (a value too long, a malformed timestamp, ...) they are split in halves, each
+    # saved the same way, until the failing rows are found. These are saved to the
+    # IMPORT_REJECTS table with the error, and the number of them returned.
+    if not Config.import_reject_rows:
+        __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns, columnTypes=[table['columns'][column] for column in dfColumns])
+        return 0
+
+    with con.cursor() as cursor:
+        cursor.execute("""SAVEPOINT IMPORT_ROWS""")
+        try:
+            __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName=destinationTableName, df=df, dfColumns=dfColumns, columnTypes=[table['columns'][column] for column in dfColumns])
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            cursor.execute("""ROLLBACK TO SAVEPOINT IMPORT_ROWS""")
+            cursor.execute("""RELEASE SAVEPOINT IMPORT_ROWS""")
+            if len(df) == 1:
+                __saveReject(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, df=df, dfColumns=dfColumns, error=e)
+                return 1
+            middle = len(df) // 2
+            return sum(
+                __saveRejectingDataframe(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, destinationTableName=destinationTableName, df=halfDf, dfColumns=dfColumns)
+                for halfDf in [__sliceDataframe(df, 0, middle), __sliceDataframe(df, middle, len(df))]
+                )
+        cursor.execute("""RELEASE SAVEPOINT IMPORT_ROWS""")
+    return 0
+
+
+def __saveReject(con, sourceSchemaName, table, filePath, df, dfColumns, error):
+
+    row = __encodeDataframe(df=df, dfColumns=dfColumns).read()
+    row = (row.decode('utf-8') if isinstance(row, bytes) else row).rstrip('\r\n')
+    error = str(error).splitlines()[0]
+    log.info("Rejected row of file: " + str(filePath) + " (" + error + "): " + row)
+    with con.cursor() as cursor:
+        cursor.execute("""INSERT INTO """ + sourceSchemaName + """.IMPORT_REJECTS (TABLE_NAME, FILE_PATH, ERROR, ROW_DATA, REJECTED_AT)
+            VALUES (%s, %s, %s, %s, NOW())
+            """, (table['table_name'], filePath, error, row))
+
+
+def __saveTableDataframe(con, sourceSchemaName, table, df, filePath=None):
+
+    import numpy as np
+
+    # Returns the number of rows rejected. Rows of hash partitioned tables are routed
+    # to their partition by the database.
+    dfColumns = list(table['columns'].keys())
+    if __getPartitionMethod(table) in (None, 'hash'):
+        return __saveRejectingDataframe(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, destinationTableName=table['table_name'], df=df, dfColumns=dfColumns)
+
+    # Rows are routed to their partition here, so that each partition is loaded
+    # directly instead of routing every row through the parent table.
+    partitions = __getPartitions(table)
+    bounds = table['partition_bounds']
+    if __isArrowTable(df):
+        values = df.column(table['partition_column']).to_numpy().astype('float64')
+    else:
+        values = df[table['partition_column']].to_numpy(dtype='float64', na_value=np.nan)
+    partitionIndex = np.searchsorted(bounds, values, side='right')
+    partitionIndex[partitionIndex == len(bounds)] = 0
+    rejectedRows = 0
+    for index in np.unique(partitionIndex):
+        if index == 0:
+            destinationTableName = __getDefaultPartition(table)
+        else:
+            destinationTableName = partitions[index - 1][0]
+        if __isArrowTable(df):
+            partitionDf = df.filter(partitionIndex == index)
+        else:
+            partitionDf = df[partitionIndex == index]
+        rejectedRows += __saveRejectingDataframe(con=con, sourceSchemaName=sourceSchemaName, table=table, filePath=filePath, destinationTableName=destinationTableName, df=partitionDf, dfColumns=dfColumns)
+    return rejectedRows
+
+
+def __unlogged(createQuery):
+
+    if Config.import_unlogged_tables:
+        return createQuery.replace('CREATE TABLE', 'CREATE UNLOGGED TABLE', 1)
+    return createQuery
+
+
+def __getCreateQuery(sourceSchemaName, table, partitionClause=''):
+
+    columns = ',\n'.join('            ' + column.upper() + ' ' + sqlType for column, sqlType in table['columns'].items())
+    return """CREATE TABLE """ + sourceSchemaName + """.""" + table['table_name'] + """
         (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT,
-            STAY_ID INT,
-            CHARTTIME TIMESTAMP(0) NOT NULL,
-            STORETIME TIMESTAMP(0) NOT NULL,
-            ITEMID INT NOT NULL,
-            VALUE TIMESTAMP(0) NOT NULL,
-            VALUEUOM VARCHAR(50) NOT NULL,
-            WARNING SMALLINT NOT NULL
+""" + columns + """
         )
+        """ + partitionClause + """
         ;
         """
-    with con:
-        with con.cursor() as cursor:
-            cursor.execute(dropQuery)
-            cursor.execute(createQuery)
 
-    import pandas as pd
 
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.datetimeevents['column_mapping']['subject_id'],
-        Config.datetimeevents['column_mapping']['hadm_id'],
-        Config.datetimeevents['column_mapping']['stay_id'],
-        Config.datetimeevents['column_mapping']['charttime'],
-        Config.datetimeevents['column_mapping']['storetime'],
-        Config.datetimeevents['column_mapping']['itemid'],
-        Config.datetimeevents['column_mapping']['value'],
-        Config.datetimeevents['column_mapping']['valueuom'],
-        Config.datetimeevents['column_mapping']['warning'],
+def __getConstraintQueries(sourceSchemaName, table):
+
+    primaryKey = __getPrimaryKey(table)
+    if len(primaryKey) == 0:
+        return []
+    return [
+        """ALTER TABLE """ + sourceSchemaName + """.""" + table['table_name'] + """ ADD CONSTRAINT """ + table['table_name'].lower() + """_pk PRIMARY KEY (""" + ', '.join(column.upper() for column in primaryKey) + """)""",
         ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='DATETIMEEVENTS', df=df, dfColumns=dfColumns)
 
 
-def importChartEvents(con, sourceSchemaName, filePath, fileSeparator, createSchema=True):
+def __createRangePartitions(cursor, sourceSchemaName, table):
 
-    log.info("Creating table: " + sourceSchemaName + ".CHARTEVENTS")
+    tableName = table['table_name']
+    partitionColumn = table['partition_column'].upper()
 
-    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.CHARTEVENTS CASCADE"""
-    createQuery = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS
-        (
-            SUBJECT_ID INT NOT NULL,
-            HADM_ID INT NOT NULL,
-            STAY_ID INT NOT NULL,
-            CHARTTIME TIMESTAMP(0) NOT NULL,
-            STORETIME TIMESTAMP(0) ,
-            ITEMID INT NOT NULL,
-            VALUE VARCHAR(160) ,
-            VALUENUM DOUBLE PRECISION,
-            VALUEUOM VARCHAR(20),
-            WARNING SMALLINT NOT NULL
-        )
-        ;
-        """
-    createChildQuery1 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_1 ( CHECK ( itemid >= 220000 AND itemid < 221000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery2 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_2 ( CHECK ( itemid >= 221000 AND itemid < 222000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery3 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_3 ( CHECK ( itemid >= 222000 AND itemid < 223000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery4 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_4 ( CHECK ( itemid >= 223000 AND itemid < 224000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery5 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_5 ( CHECK ( itemid >= 224000 AND itemid < 225000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery6 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_6 ( CHECK ( itemid >= 225000 AND itemid < 226000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery7 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_7 ( CHECK ( itemid >= 226000 AND itemid < 227000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery8 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_8 ( CHECK ( itemid >= 227000 AND itemid < 228000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery9 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_9 ( CHECK ( itemid >= 228000 AND itemid < 229000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createChildQuery10 = """CREATE TABLE """ + sourceSchemaName + """.CHARTEVENTS_10 ( CHECK ( itemid >= 229000 AND itemid < 230000 )) INHERITS (""" + sourceSchemaName + """.CHARTEVENTS);"""
-    createFunctionQuery = """CREATE OR REPLACE FUNCTION """ + sourceSchemaName + """.chartevents_insert_trigger()
+    cursor.execute(__getCreateQuery(sourceSchemaName=sourceSchemaName, table=table, partitionClause="""PARTITION BY RANGE (""" + partitionColumn + """)"""))
+    for partitionName, lowerBound, upperBound in __getPartitions(table):
+        log.info("Creating partition: " + sourceSchemaName + "." + partitionName)
+        cursor.execute(__unlogged("""CREATE TABLE """ + sourceSchemaName + """.""" + partitionName + """ PARTITION OF """ + sourceSchemaName + """.""" + tableName + """ FOR VALUES FROM (""" + str(lowerBound) + """) TO (""" + str(upperBound) + """);"""))
+    log.info("Creating partition: " + sourceSchemaName + "." + __getDefaultPartition(table))
+    cursor.execute(__unlogged("""CREATE TABLE """ + sourceSchemaName + """.""" + __getDefaultPartition(table) + """ PARTITION OF """ + sourceSchemaName + """.""" + tableName + """ DEFAULT;"""))
+
+
+def __createHashPartitions(cursor, sourceSchemaName, table):
+
+    tableName = table['table_name']
+    partitionColumn = table['hash_partition_column'].upper()
+
+    cursor.execute(__getCreateQuery(sourceSchemaName=sourceSchemaName, table=table, partitionClause="""PARTITION BY HASH (""" + partitionColumn + """)"""))
+    for remainder, partitionName in enumerate(__getHashPartitions(table)):
+        log.info("Creating partition: " + sourceSchemaName + "." + partitionName)
+        cursor.execute(__unlogged("""CREATE TABLE """ + sourceSchemaName + """.""" + partitionName + """ PARTITION OF """ + sourceSchemaName + """.""" + tableName + """ FOR VALUES WITH (MODULUS """ + str(Config.import_hash_partitions) + """, REMAINDER """ + str(remainder) + """);"""))
+
+
+def __createInheritedPartitions(cursor, sourceSchemaName, table):
+
+    tableName = table['table_name']
+    partitionColumn = table['partition_column']
+    functionName = sourceSchemaName + """.""" + tableName.lower() + """_insert_trigger()"""
+    triggerName = """insert_""" + tableName.lower() + """_trigger"""
+
+    cursor.execute(__unlogged(__getCreateQuery(sourceSchemaName=sourceSchemaName, table=table)))
+    conditions = []
+    for partitionName, lowerBound, upperBound in __getPartitions(table):
+        check = """NEW.""" + partitionColumn + """ >= """ + str(lowerBound) + """ AND NEW.""" + partitionColumn + """ < """ + str(upperBound)
+        log.info("Creating child table: " + sourceSchemaName + "." + partitionName)
+        cursor.execute(__unlogged("""CREATE TABLE """ + sourceSchemaName + """.""" + partitionName + """ ( CHECK ( """ + check.replace('NEW.', '') + """ )) INHERITS (""" + sourceSchemaName + """.""" + tableName + """);"""))
+        conditions.append("""( """ + check + """ ) THEN INSERT INTO """ + sourceSchemaName + """.""" + partitionName + """ VALUES (NEW.*);""")
+    log.info("Creating child table: " + sourceSchemaName + "." + __getDefaultPartition(table))
+    cursor.execute(__unlogged("""CREATE TABLE """ + sourceSchemaName + """.""" + __getDefaultPartition(table) + """ () INHERITS (""" + sourceSchemaName + """.""" + tableName + """);"""))
+
+    log.info("Creating function: " + functionName)
+    cursor.execute("""CREATE OR REPLACE FUNCTION """ + functionName + """
         RETURNS TRIGGER AS $$
         BEGIN
-        IF ( NEW.itemid >= 220000 AND NEW.itemid < 221000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_1 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 221000 AND NEW.itemid < 222000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_2 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 222000 AND NEW.itemid < 223000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_3 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 223000 AND NEW.itemid < 224000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_4 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 224000 AND NEW.itemid < 225000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_5 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 225000 AND NEW.itemid < 226000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_6 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 226000 AND NEW.itemid < 227000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_7 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 227000 AND NEW.itemid < 228000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_8 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 228000 AND NEW.itemid < 229000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_9 VALUES (NEW.*);
-        ELSIF ( NEW.itemid >= 229000 AND NEW.itemid < 230000 ) THEN INSERT INTO """ + sourceSchemaName + """.CHARTEVENTS_10 VALUES (NEW.*);
+        IF """ + """
+        ELSIF """.join(conditions) + """
         ELSE
-            INSERT INTO """ + sourceSchemaName + """.chartevents_null VALUES (NEW.*);
+            INSERT INTO """ + sourceSchemaName + """.""" + __getDefaultPartition(table) + """ VALUES (NEW.*);
         END IF;
         RETURN NULL;
         END;
         $$
         LANGUAGE plpgsql
         ;
-        """
-    dropTriggerQuery = """DROP TRIGGER IF EXISTS insert_chartevents_trigger
-    ON """ + sourceSchemaName + """.CHARTEVENTS
+        """)
+    log.info("Creating trigger: " + sourceSchemaName + "." + tableName + "." + triggerName)
+    cursor.execute("""DROP TRIGGER IF EXISTS """ + triggerName + """ ON """ + sourceSchemaName + """.""" + tableName)
+    cursor.execute("""CREATE TRIGGER """ + triggerName + """
+    BEFORE INSERT ON """ + sourceSchemaName + """.""" + tableName + """
+    FOR EACH ROW EXECUTE PROCEDURE """ + functionName + """
     ;
-    """
-    createTriggerQuery = """CREATE TRIGGER insert_chartevents_trigger
-    BEFORE INSERT ON """ + sourceSchemaName + """.CHARTEVENTS
-    FOR EACH ROW EXECUTE PROCEDURE """ + sourceSchemaName + """.chartevents_insert_trigger()
-    ;
-    """
-    if createSchema:
-        with con:
-            with con.cursor() as cursor:
-                cursor.execute(dropQuery)
-                cursor.execute(createQuery)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_1")
-                cursor.execute(createChildQuery1)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_2")
-                cursor.execute(createChildQuery2)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_3")
-                cursor.execute(createChildQuery3)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_4")
-                cursor.execute(createChildQuery4)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_5")
-                cursor.execute(createChildQuery5)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_6")
-                cursor.execute(createChildQuery6)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_7")
-                cursor.execute(createChildQuery7)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_8")
-                cursor.execute(createChildQuery8)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_9")
-                cursor.execute(createChildQuery9)
-                log.info("Creating child table: " + sourceSchemaName + ".CHARTEVENTS_10")
-                cursor.execute(createChildQuery10)
-                log.info("Creating function: " + sourceSchemaName + ".CHARTEVENTS.chartevents_insert_trigger()")
-                cursor.execute(createFunctionQuery)
-                log.info("Dropping trigger: " + sourceSchemaName + ".CHARTEVENTS.insert_chartevents_trigger")
-                cursor.execute(dropTriggerQuery)
-                log.info("Creating trigger: " + sourceSchemaName + ".CHARTEVENTS.insert_chartevents_trigger")
-                cursor.execute(createTriggerQuery)
+    """)
 
-    import pandas as pd
 
-    log.info("Reading file: " + str(filePath))
-    df = pd.read_csv(filePath, sep=fileSeparator)
-    dfColumns = [
-        Config.chartevents['column_mapping']['subject_id'],
-        Config.chartevents['column_mapping']['hadm_id'],
-        Config.chartevents['column_mapping']['stay_id'],
-        Config.chartevents['column_mapping']['charttime'],
-        Config.chartevents['column_mapping']['storetime'],
-        Config.chartevents['column_mapping']['itemid'],
-        Config.chartevents['column_mapping']['value'],
-        Config.chartevents['column_mapping']['valuenum'],
-        Config.chartevents['column_mapping']['valueuom'],
-        Config.chartevents['column_mapping']['warning'],
-        ]
-    __saveDataframe(con=con, destinationSchemaName=sourceSchemaName, destinationTableName='CHARTEVENTS', df=df, dfColumns=dfColumns)
+def __createTable(con, sourceSchemaName, table):
 
+    log.info("Creating table: " + sourceSchemaName + "." + table['table_name'])
 
-def importDataCsv(con, sourceSchemaName):
-    importPatients(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.patients['file_name'],
-        fileSeparator=','
-        )
-    importAdmissions(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.admissions['file_name'],
-        fileSeparator=','
-        )
-    importTransfers(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.transfers['file_name'],
-        fileSeparator=','
-        )
-    importDiagnosesIcd(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.diagnoses_icd['file_name'],
-        fileSeparator=','
-        )
-    importServices(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.services['file_name'],
-        fileSeparator=','
-        )
-    importLabEvents(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.labevents['file_name'],
-        fileSeparator=','
-        )
-    # i = 'a'
-    # filePath = '/superbugai-data/mimiciv/1.0/hosp/xa'
-    # importLabEvents(
-    #     con=con,
-    #     sourceSchemaName=sourceSchemaName,
-    #     filePath = filePath + i,
-    #     fileSeparator=','
-    #     )
-    # for i in ['b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm']:
-    #     filePath = '/superbugai-data/mimiciv/1.0/hosp/xa'
-    #     importLabEvents(
-    #         con=con,
-    #         sourceSchemaName=sourceSchemaName,
-    #         filePath = filePath + i,
-    #         fileSeparator=',',
-    #         createSchema=False
-    #         )
-    importLabItems(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.d_labitems['file_name'],
-        fileSeparator=','
-        )
-    importProcedures(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.procedures_icd['file_name'],
-        fileSeparator=','
-        )
-    importHcpcsEvents(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.hcpcsevents['file_name'],
-        fileSeparator=','
-        )
-    importDrugCodes(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.drgcodes['file_name'],
-        fileSeparator=','
-        )
-    importPrescriptions(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.prescriptions['file_name'],
-        fileSeparator=','
-        )
-    importMicrobiologyEvents(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.microbiologyevents['file_name'],
-        fileSeparator=','
+    dropQuery = """DROP TABLE IF EXISTS """ + sourceSchemaName + """.""" + table['table_name'] + """ CASCADE"""
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(dropQuery)
+            partitionMethod = __getPartitionMethod(table)
+            if partitionMethod is None:
+                cursor.execute(__unlogged(__getCreateQuery(sourceSchemaName=sourceSchemaName, table=table)))
+            elif partitionMethod == 'hash':
+                __createHashPartitions(cursor=cursor, sourceSchemaName=sourceSchemaName, table=table)
+            elif partitionMethod == 'range':
+                __createRangePartitions(cursor=cursor, sourceSchemaName=sourceSchemaName, table=table)
+            elif partitionMethod == 'inherits':
+                __createInheritedPartitions(cursor=cursor, sourceSchemaName=sourceSchemaName, table=table)
+            else:
+                raise ValueError("Unknown import_partitioning: " + str(Config.import_partitioning))
+            if not Config.import_deferred_constraints:
+                for constraintQuery in __getConstraintQueries(sourceSchemaName=sourceSchemaName, table=table):
+                    cursor.execute(constraintQuery)
+
+
+def __finaliseTable(con, sourceSchemaName, table):
+
+    # Tables holding the rows: the table itself, or its partitions (and the parent
+    # table when partitioned by inheritance)
+    partitionMethod = __getPartitionMethod(table)
+    tableNames = [table['table_name']]
+    if partitionMethod == 'hash':
+        tableNames = __getHashPartitions(table)
+    elif partitionMethod is not None:
+        tableNames = [partitionName for partitionName, lowerBound, upperBound in __getPartitions(table)] + [__getDefaultPartition(table)]
+        if partitionMethod == 'inherits':
+            tableNames.append(table['table_name'])
+
+    # Primary keys are built once on the loaded table instead of being maintained for
+    # every inserted row
+    with con:
+        with con.cursor() as cursor:
+            if Config.import_deferred_constraints:
+                for constraintQuery in __getConstraintQueries(sourceSchemaName=sourceSchemaName, table=table):
+                    alterTableQuery, constraint = constraintQuery.split(' ADD CONSTRAINT ')
+                    # A resumed import may have added the constraint before it was interrupted
+                    cursor.execute(alterTableQuery + """ DROP CONSTRAINT IF EXISTS """ + constraint.split(' ')[0])
+                    log.info("Adding constraint: " + constraint)
+                    cursor.execute(constraintQuery)
+            if Config.import_unlogged_tables and Config.import_set_logged:
+                for tableName in tableNames:
+                    log.info("Setting table to LOGGED: " + sourceSchemaName + '.' + tableName)
+                    cursor.execute("""ALTER TABLE """ + sourceSchemaName + """.""" + tableName + """ SET LOGGED""")
+            if partitionMethod in ('range', 'hash'):
+                cursor.execute("""ANALYZE """ + sourceSchemaName + """.""" + table['table_name'])
+
+
+def __newMetrics(tableName, filePath):
+
+    return {
+        'table_name': tableName,
+        'file_path': filePath,
+        'rows_read': 0,
+        'rows_written': 0,
+        'rows_rejected': 0,
+        'bytes_read': 0,
+        'parse_seconds': 0.0,
+        'write_seconds': 0.0,
+        'total_seconds': 0.0,
+        'peak_rss_bytes': 0,
+        }
+
+
+def __getRowsPerSecond(metrics):
+
+    return metrics['rows_written'] / metrics['total_seconds'] if metrics['total_seconds'] > 0 else 0.0
+
+
+def __formatMetrics(metrics):
+
+    return (
+        "Imported " + (str(metrics['file_path']) if metrics['file_path'] is not None else "table: " + metrics['table_name'])
+        + ": " + str(metrics['rows_written']) + " rows"
+        + (", " + str(metrics['rows_rejected']) + " rejected" if metrics['rows_rejected'] > 0 else "")
+        + ", " + str(round(metrics['bytes_read'] / 1024 / 1024, 1)) + " MB"
+        + ", parse " + str(round(metrics['parse_seconds'], 1)) + " s"
+        + ", write " + str(round(metrics['write_seconds'], 1)) + " s"
+        + ", total " + str(round(metrics['total_seconds'], 1)) + " s"
+        + ", " + str(round(__getRowsPerSecond(metrics))) + " rows/s"
+        + ", peak RSS " + str(round(metrics['peak_rss_bytes'] / 1024 / 1024)) + " MB"
         )
-    importPharmacy(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.pharmacy['file_name'],
-        fileSeparator=','
+
+
+def __saveMetrics(con, sourceSchemaName, runId, metrics):
+
+    insertQuery = """INSERT INTO """ + sourceSchemaName + """.IMPORT_METRICS
+        (RUN_ID, TABLE_NAME, FILE_PATH, ROWS_READ, ROWS_WRITTEN, ROWS_REJECTED, BYTES_READ, PARSE_SECONDS, WRITE_SECONDS, TOTAL_SECONDS, ROWS_PER_SECOND, PEAK_RSS_BYTES, RECORDED_AT)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        """
+    with con:
+        with con.cursor() as cursor:
+            for metric in metrics:
+                cursor.execute(insertQuery, (
+                    runId, metric['table_name'], metric['file_path'], metric['rows_read'], metric['rows_written'], metric['rows_rejected'], metric['bytes_read'],
+                    metric['parse_seconds'], metric['write_seconds'], metric['total_seconds'], __getRowsPerSecond(metric), metric['peak_rss_bytes']
+                    ))
+
+
+def __writeMetricsReport(runId, startedAt, tableMetrics):
+
+    import datetime
+    import json
+
+    finishedAt = datetime.datetime.now()
+    report = {
+        'run_id': runId,
+        'started_at': startedAt.isoformat(),
+        'finished_at': finishedAt.isoformat(),
+        'total_seconds': (finishedAt - startedAt).total_seconds(),
+        'rows_written': sum(metrics['rows_written'] for metrics in tableMetrics),
+        'rows_rejected': sum(metrics['rows_rejected'] for metrics in tableMetrics),
+        'bytes_read': sum(metrics['bytes_read'] for metrics in tableMetrics),
+        'peak_rss_bytes': max([0] + [metrics['peak_rss_bytes'] for metrics in tableMetrics]),
+        'tables': [
+            dict(metrics, rows_per_second=__getRowsPerSecond(metrics), files=[dict(fileMetrics, rows_per_second=__getRowsPerSecond(fileMetrics)) for fileMetrics in metrics['files']])
+            for metrics in tableMetrics
+            ],
+        }
+    log.info("Writing import metrics report: " + Config.import_metrics_report)
+    with open(Config.import_metrics_report, 'w') as f:
+        json.dump(report, f, indent=4)
+
+
+def __filterWatermark(df, table, watermarkValue):
+
+    # Keeps the rows beyond the watermark. Integer and float columns are compared as
+    # numbers, text and timestamps as text (the timestamps of the files sort as text).
+    column = table['watermark_column']
+    columnType = __getColumnType(table['columns'][column])
+    if columnType == 'integer':
+        watermarkValue = int(watermarkValue)
+    elif columnType == 'float':
+        watermarkValue = float(watermarkValue)
+
+    if __isArrowTable(df):
+        import pyarrow.compute
+
+        return df.filter(pyarrow.compute.greater(df.column(column), watermarkValue))
+    if columnType == 'text':
+        return df[df[column].fillna('') > watermarkValue]
+    return df[df[column].gt(watermarkValue).fillna(False).astype(bool)]
+
+
+def __getChunkWatermark(df, table):
+
+    # The largest value of the watermark column in a chunk, as text (None if the chunk
+    # has no values)
+    column = table['watermark_column']
+    if __isArrowTable(df):
+        import pyarrow.compute
+
+        watermarkValue = pyarrow.compute.max(df.column(column)).as_py()
+    else:
+        values = df[column].dropna()
+        watermarkValue = values.max() if len(values) > 0 else None
+    return str(watermarkValue) if watermarkValue is not None else None
+
+
+def __maxWatermark(table, watermarkValues):
+
+    # The largest of the watermark values, compared as __filterWatermark compares them
+    columnType = __getColumnType(table['columns'][table['watermark_column']])
+    convert = {'integer': int, 'float': float, 'text': str}[columnType]
+    watermarkValues = [watermarkValue for watermarkValue in watermarkValues if watermarkValue is not None]
+    return max(watermarkValues, key=convert) if len(watermarkValues) > 0 else None
+
+
+def __isSampledTable(table):
+
+    # Tables without the sample column (the dictionaries) are imported in full
+    if Config.import_sample_fraction is None and Config.import_sample_subjects is None:
+        return False
+    return Config.import_sample_column in table['columns']
+
+
+def __getSampleSubjects():
+
+    # The subjects are given as a list of ids, or as a file with one id per line
+    subjects = Config.import_sample_subjects
+    if isinstance(subjects, str):
+        with open(subjects) as f:
+            subjects = [line.strip() for line in f if line.strip() != '']
+    return sorted(set(int(subject) for subject in subjects))
+
+
+def __getSampleMask(values, sampleSubjects):
+
+    import numpy
+
+    if sampleSubjects is not None:
+        return numpy.isin(values, sampleSubjects)
+
+    if not 0 < Config.import_sample_fraction <= 1:
+        raise ValueError("import_sample_fraction must be within (0, 1]: " + str(Config.import_sample_fraction))
+
+    # splitmix64 of the ids, so that a subject is in or out of the sample in every
+    # table and every run, whatever the order and the files the rows come from
+    hashes = values.astype(numpy.uint64)
+    with numpy.errstate(over='ignore'):
+        hashes = hashes + numpy.uint64(0x9E3779B97F4A7C15)
+        hashes = (hashes ^ (hashes >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        hashes = (hashes ^ (hashes >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        hashes = hashes ^ (hashes >> numpy.uint64(31))
+    return (hashes >> numpy.uint64(11)) < numpy.uint64(int(Config.import_sample_fraction * 2 ** 53))
+
+
+def __filterSample(df, sampleSubjects):
+
+    # Keeps the rows of the sampled subjects; rows without a subject are dropped
+    column = Config.import_sample_column
+    if __isArrowTable(df):
+        import pyarrow as pa
+        import pyarrow.compute
+
+        values = df.column(column)
+        mask = __getSampleMask(values=pyarrow.compute.fill_null(values, 0).to_numpy(), sampleSubjects=sampleSubjects)
+        return df.filter(pa.array(mask & values.is_valid().to_numpy(zero_copy_only=False)))
+    values = df[column]
+    mask = __getSampleMask(values=values.fillna(0).to_numpy(dtype='int64'), sampleSubjects=sampleSubjects)
+    return df[mask & values.notna().to_numpy()]
+
+
+def __getFileHash(filePaths, table):
+
+    import hashlib
+    import os
+
+    # The files are identified by their path, size and modification time rather than
+    # by their content, so that they are not read an extra time to be identified
+    fileHash = hashlib.md5()
+    for filePath in filePaths:
+        fileStat = os.stat(filePath)
+        fileHash.update((os.path.abspath(filePath) + '|' + str(fileStat.st_size) + '|' + str(fileStat.st_mtime_ns) + '\n').encode())
+
+    # The import of files split into byte ranges is only resumed for the same ranges
+    if any(__isSplitFile(filePath) for filePath in filePaths):
+        fileHash.update(('split' + repr(Config.import_split_bytes)).encode())
+
+    # A sampled import is only resumed or skipped for the same sample
+    if __isSampledTable(table):
+        if Config.import_sample_subjects is not None:
+            fileHash.update(repr(__getSampleSubjects()).encode())
+        else:
+            fileHash.update(repr(Config.import_sample_fraction).encode())
+    return fileHash.hexdigest()
+
+
+def __createImportTables(con, sourceSchemaName):
+
+    createWatermarkQuery = """CREATE TABLE IF NOT EXISTS """ + sourceSchemaName + """.IMPORT_WATERMARK
+        (
+            TABLE_NAME VARCHAR(100) NOT NULL PRIMARY KEY,
+            FILE_HASH VARCHAR(32) NOT NULL,
+            WATERMARK_COLUMN VARCHAR(100),
+            WATERMARK_VALUE TEXT,
+            IMPORTED_AT TIMESTAMP NOT NULL
         )
-    importProcedureEvents(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.procedureevents['file_name'],
-        fileSeparator=','
+        ;
+        """
+    createProgressQuery = """CREATE TABLE IF NOT EXISTS """ + sourceSchemaName + """.IMPORT_PROGRESS
+        (
+            TABLE_NAME VARCHAR(100) NOT NULL,
+            FILE_PATH TEXT NOT NULL,
+            FILE_HASH VARCHAR(32) NOT NULL,
+            CHUNKS INT NOT NULL,
+            ROWS BIGINT NOT NULL, -- the rows of the file read, skipped when the import is resumed
+            COMPLETED BOOLEAN NOT NULL,
+            UPDATED_AT TIMESTAMP NOT NULL,
+            WATERMARK_VALUE TEXT, -- the largest value of the watermark column loaded from the file
+            ROWS_LOADED BIGINT NOT NULL, -- the rows written to the table or rejected, fewer than ROWS when rows are filtered out
+            PRIMARY KEY (TABLE_NAME, FILE_PATH)
         )
-    importItems(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.d_items['file_name'],
-        fileSeparator=','
+        ;
+        """
+    # Columns added to the tables created by earlier imports
+    alterProgressQueries = [
+        """ALTER TABLE """ + sourceSchemaName + """.IMPORT_PROGRESS ADD COLUMN IF NOT EXISTS WATERMARK_VALUE TEXT""",
+        """ALTER TABLE """ + sourceSchemaName + """.IMPORT_PROGRESS ADD COLUMN IF NOT EXISTS ROWS_LOADED BIGINT NOT NULL DEFAULT 0""",
+        ]
+    createMetricsQuery = """CREATE TABLE IF NOT EXISTS """ + sourceSchemaName + """.IMPORT_METRICS
+        (
+            RUN_ID VARCHAR(14) NOT NULL,
+            TABLE_NAME VARCHAR(100) NOT NULL,
+            FILE_PATH TEXT, -- NULL for the totals of the table
+            ROWS_READ BIGINT NOT NULL,
+            ROWS_WRITTEN BIGINT NOT NULL,
+            ROWS_REJECTED BIGINT NOT NULL,
+            BYTES_READ BIGINT NOT NULL,
+            PARSE_SECONDS DOUBLE PRECISION NOT NULL,
+            WRITE_SECONDS DOUBLE PRECISION NOT NULL,
+            TOTAL_SECONDS DOUBLE PRECISION NOT NULL,
+            ROWS_PER_SECOND DOUBLE PRECISION NOT NULL,
+            PEAK_RSS_BYTES BIGINT NOT NULL,
+            RECORDED_AT TIMESTAMP NOT NULL
         )
-    importDatetimeEvents(
-        con=con,
-        sourceSchemaName=sourceSchemaName,
-        filePath = Config.datetimeevents['file_name'],
-        fileSeparator=','
+        ;
+        """
+    createRejectsQuery = """CREATE TABLE IF NOT EXISTS """ + sourceSchemaName + """.IMPORT_REJECTS
+        (
+            TABLE_NAME VARCHAR(100) NOT NULL,
+            FILE_PATH TEXT,
+            ERROR TEXT NOT NULL,
+            ROW_DATA TEXT NOT NULL, -- the rejected row as CSV, in the column order of the table
+            REJECTED_AT TIMESTAMP NOT NULL
         )
-    importChartEvents(
+        ;
+        """
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(createWatermarkQuery)
+            cursor.execute(createProgressQuery)
+            for alterProgressQuery in alterProgressQueries:
+                cursor.execute(alterProgressQuery)
+            cursor.execute(createMetricsQuery)
+            cursor.execute(createRejectsQuery)
+
+
+def __getProgress(con, sourceSchemaName, table, fileHash):
+
+    # Chunks, rows read, completion, watermark and rows loaded of each file loaded by an
+    # interrupted import of the same files. The progress is discarded unless the rows it records are all in the
+    # table (or rejected), as UNLOGGED tables are emptied if the database crashes.
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""SELECT TO_REGCLASS(%s)""", (sourceSchemaName + '.' + table['table_name'], ))
+            if cursor.fetchone()[0] is None:
+                return {}
+            cursor.execute("""SELECT FILE_PATH, CHUNKS, ROWS, COMPLETED, WATERMARK_VALUE, ROWS_LOADED FROM """ + sourceSchemaName + """.IMPORT_PROGRESS WHERE TABLE_NAME = %s AND FILE_HASH = %s""", (table['table_name'], fileHash))
+            progress = {filePath: (chunks, rows, completed, watermarkValue, loadedRows) for filePath, chunks, rows, completed, watermarkValue, loadedRows in cursor.fetchall()}
+            if len(progress) == 0:
+                return {}
+            cursor.execute("""SELECT COUNT(*) FROM """ + sourceSchemaName + """.""" + table['table_name'])
+            tableRows = cursor.fetchone()[0]
+            cursor.execute("""SELECT COUNT(*) FROM """ + sourceSchemaName + """.IMPORT_REJECTS WHERE TABLE_NAME = %s""", (table['table_name'], ))
+            tableRows += cursor.fetchone()[0]
+    if tableRows != sum(loadedRows for chunks, rows, completed, watermarkValue, loadedRows in progress.values()):
+        log.info("Table: " + sourceSchemaName + "." + table['table_name'] + " does not hold the rows of the interrupted import, importing all rows")
+        return {}
+    return progress
+
+
+def __saveProgress(con, sourceSchemaName, table, filePath, fileHash, chunkNumber, rows, loadedRows, completed, watermarkValue=None):
+
+    with con.cursor() as cursor:
+        cursor.execute("""INSERT INTO """ + sourceSchemaName + """.IMPORT_PROGRESS (TABLE_NAME, FILE_PATH, FILE_HASH, CHUNKS, ROWS, COMPLETED, UPDATED_AT, WATERMARK_VALUE, ROWS_LOADED)
+            VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s, %s)
+            ON CONFLICT (TABLE_NAME, FILE_PATH) DO UPDATE SET
+                FILE_HASH = EXCLUDED.FILE_HASH,
+                CHUNKS = EXCLUDED.CHUNKS,
+                ROWS = EXCLUDED.ROWS,
+                COMPLETED = EXCLUDED.COMPLETED,
+                UPDATED_AT = EXCLUDED.UPDATED_AT,
+                WATERMARK_VALUE = EXCLUDED.WATERMARK_VALUE,
+                ROWS_LOADED = EXCLUDED.ROWS_LOADED
+            """, (table['table_name'], filePath, fileHash, chunkNumber, rows, completed, watermarkValue, loadedRows))
+
+
+def __getLoadedWatermark(con, sourceSchemaName, table, fileHash):
+
+    # The largest watermark value of the files loaded to the table, recorded with their
+    # progress as they are loaded
+    with con.cursor() as cursor:
+        cursor.execute("""SELECT WATERMARK_VALUE FROM """ + sourceSchemaName + """.IMPORT_PROGRESS WHERE TABLE_NAME = %s AND FILE_HASH = %s""", (table['table_name'], fileHash))
+        return __maxWatermark(table=table, watermarkValues=[row[0] for row in cursor.fetchall()])
+
+
+def __deleteProgress(con, sourceSchemaName, table):
+
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""DELETE FROM """ + sourceSchemaName + """.IMPORT_PROGRESS WHERE TABLE_NAME = %s""", (table['table_name'], ))
+
+
+def __deleteRejects(con, sourceSchemaName, table):
+
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""DELETE FROM """ + sourceSchemaName + """.IMPORT_REJECTS WHERE TABLE_NAME = %s""", (table['table_name'], ))
+
+
+def __getWatermark(con, sourceSchemaName, table):
+
+    # The file hash and watermark value recorded by the last import of the table, or
+    # None if the table has not been imported
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""SELECT TO_REGCLASS(%s)""", (sourceSchemaName + '.' + table['table_name'], ))
+            if cursor.fetchone()[0] is None:
+                return None
+            cursor.execute("""SELECT FILE_HASH, WATERMARK_VALUE FROM """ + sourceSchemaName + """.IMPORT_WATERMARK WHERE TABLE_NAME = %s""", (table['table_name'], ))
+            return cursor.fetchone()
+
+
+def __deleteWatermark(con, sourceSchemaName, table):
+
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""DELETE FROM """ + sourceSchemaName + """.IMPORT_WATERMARK WHERE TABLE_NAME = %s""", (table['table_name'], ))
+
+
+def __saveWatermark(con, sourceSchemaName, table, fileHash, watermarkValue):
+
+    watermarkColumn = table.get('watermark_column')
+    with con.cursor() as cursor:
+        log.info("Recording watermark of table: " + sourceSchemaName + "." + table['table_name'] + " " + str(watermarkColumn) + " = " + str(watermarkValue))
+        cursor.execute("""INSERT INTO """ + sourceSchemaName + """.IMPORT_WATERMARK (TABLE_NAME, FILE_HASH, WATERMARK_COLUMN, WATERMARK_VALUE, IMPORTED_AT)
+            VALUES (%s, %s, %s, %s, NOW())
+            ON CONFLICT (TABLE_NAME) DO UPDATE SET
+                FILE_HASH = EXCLUDED.FILE_HASH,
+                WATERMARK_COLUMN = EXCLUDED.WATERMARK_COLUMN,
+                WATERMARK_VALUE = EXCLUDED.WATERMARK_VALUE,
+                IMPORTED_AT = EXCLUDED.IMPORTED_AT
+            """, (table['table_name'], fileHash, watermarkColumn, watermarkValue))
+
+
+def __mergeDeltaTable(con, sourceSchemaName, table, deltaTable):
+
+    # Rows of the delta table replace the rows with the same primary key, or are
+    # appended to the tables without a primary key
+    columns = [column.upper() for column in table['columns'].keys()]
+    primaryKey = [column.upper() for column in __getPrimaryKey(table)]
+    if len(primaryKey) > 0:
+        log.info("Upserting table: " + sourceSchemaName + "." + table['table_name'] + " from " + deltaTable['table_name'])
+        mergeQuery = """INSERT INTO """ + sourceSchemaName + """.""" + table['table_name'] + """ (""" + ', '.join(columns) + """)
+            SELECT DISTINCT ON (""" + ', '.join(primaryKey) + """) """ + ', '.join(columns) + """
+            FROM """ + sourceSchemaName + """.""" + deltaTable['table_name'] + """
+            ON CONFLICT (""" + ', '.join(primaryKey) + """) DO UPDATE SET
+            """ + ', '.join(column + """ = EXCLUDED.""" + column for column in columns) + """
+            ;
+            """
+    else:
+        log.info("Appending to table: " + sourceSchemaName + "." + table['table_name'] + " from " + deltaTable['table_name'])
+        mergeQuery = """INSERT INTO """ + sourceSchemaName + """.""" + table['table_name'] + """ (""" + ', '.join(columns) + """)
+            SELECT """ + ', '.join(columns) + """
+            FROM """ + sourceSchemaName + """.""" + deltaTable['table_name'] + """
+            ;
+            """
+    with con.cursor() as cursor:
+        cursor.execute(mergeQuery)
+        cursor.execute("""DROP TABLE """ + sourceSchemaName + """.""" + deltaTable['table_name'])
+
+
+def __importTableIncremental(con, sourceSchemaName, table, filePaths, fileSeparator, fileHash, watermarkValue):
+
+    # The new rows are loaded to a delta table, and moved to the table together with
+    # the new watermark in one transaction, so that an interrupted import leaves the
+    # table as it was and is simply run again
+    deltaTable = dict(table, table_name=table['table_name'] + '_DELTA', primary_key=[], partition_column=None, hash_partition_column=None)
+    __deleteProgress(con=con, sourceSchemaName=sourceSchemaName, table=deltaTable)
+    __createTable(con=con, sourceSchemaName=sourceSchemaName, table=deltaTable)
+    fileMetrics = __loadFiles(con=con, sourceSchemaName=sourceSchemaName, table=deltaTable, filePaths=filePaths, fileSeparator=fileSeparator, fileHash=fileHash, watermarkValue=watermarkValue)
+    with con:
+        if table.get('watermark_column') is not None:
+            watermarkValue = __maxWatermark(table=table, watermarkValues=[watermarkValue, __getLoadedWatermark(con=con, sourceSchemaName=sourceSchemaName, table=deltaTable, fileHash=fileHash)])
+        __mergeDeltaTable(con=con, sourceSchemaName=sourceSchemaName, table=table, deltaTable=deltaTable)
+        __saveWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table, fileHash=fileHash, watermarkValue=watermarkValue)
+    return fileMetrics
+
+
+def __importTable(con, sourceSchemaName, table, fileSeparator):
+
+    filePaths = __getFilePaths(table['file_name'])
+    fileHash = __getFileHash(filePaths=filePaths, table=table)
+    filePaths = __splitFiles(filePaths)
+
+    if Config.import_mode == 'incremental':
+        watermark = __getWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table)
+        if watermark is None:
+            log.info("No watermark for table: " + sourceSchemaName + "." + table['table_name'] + ", importing all rows")
+        elif watermark[0] == fileHash:
+            log.info("Files of table: " + sourceSchemaName + "." + table['table_name'] + " are unchanged, skipping")
+            return []
+        elif table.get('watermark_column') is not None or len(table.get('primary_key', [])) > 0:
+            return __importTableIncremental(con=con, sourceSchemaName=sourceSchemaName, table=table, filePaths=filePaths, fileSeparator=fileSeparator, fileHash=fileHash, watermarkValue=watermark[1])
+        else:
+            log.info("Table: " + sourceSchemaName + "." + table['table_name'] + " has no watermark column or primary key, importing all rows")
+    elif Config.import_mode != 'full':
+        raise ValueError("Unknown import_mode: " + str(Config.import_mode))
+
+    # An import interrupted part way through the same files is resumed
+    progress = {}
+    if Config.import_resume:
+        progress = __getProgress(con=con, sourceSchemaName=sourceSchemaName, table=table, fileHash=fileHash)
+    if len(progress) > 0 and all(filePath in progress and progress[filePath][2] for filePath in filePaths) and __getWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table) is not None:
+        log.info("Table: " + sourceSchemaName + "." + table['table_name'] + " was imported before the interruption, skipping")
+        return []
+    elif len(progress) > 0:
+        log.info("Resuming import of table: " + sourceSchemaName + "." + table['table_name'])
+    else:
+        __deleteWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table)
+        __deleteProgress(con=con, sourceSchemaName=sourceSchemaName, table=table)
+        __deleteRejects(con=con, sourceSchemaName=sourceSchemaName, table=table)
+        __createTable(con=con, sourceSchemaName=sourceSchemaName, table=table)
+    fileMetrics = __loadFiles(con=con, sourceSchemaName=sourceSchemaName, table=table, filePaths=filePaths, fileSeparator=fileSeparator, fileHash=fileHash, progress=progress)
+    __finaliseTable(con=con, sourceSchemaName=sourceSchemaName, table=table)
+    with con:
+        watermarkValue = None
+        if table.get('watermark_column') is not None:
+            watermarkValue = __getLoadedWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table, fileHash=fileHash)
+        __saveWatermark(con=con, sourceSchemaName=sourceSchemaName, table=table, fileHash=fileHash, watermarkValue=watermarkValue)
+    return fileMetrics
+
+
+def importTable(con, sourceSchemaName, table, fileSeparator=',', runId=None):
+
+    import datetime
+    import time
+    import psutil
+
+    runId = runId or datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    __createImportTables(con=con, sourceSchemaName=sourceSchemaName)
+
+    # The totals of the table also count the time spent creating, hashing and
+    # finalising the table, and the memory of the importing process
+    start = time.perf_counter()
+    fileMetrics = __importTable(con=con, sourceSchemaName=sourceSchemaName, table=table, fileSeparator=fileSeparator)
+    metrics = __newMetrics(tableName=table['table_name'], filePath=None)
+    for name in ['rows_read', 'rows_written', 'rows_rejected', 'bytes_read', 'parse_seconds', 'write_seconds']:
+        metrics[name] = sum(fileMetric[name] for fileMetric in fileMetrics)
+    metrics['total_seconds'] = time.perf_counter() - start
+    metrics['peak_rss_bytes'] = max([psutil.Process().memory_info().rss] + [fileMetric['peak_rss_bytes'] for fileMetric in fileMetrics])
+    log.info(__formatMetrics(metrics))
+
+    __saveMetrics(con=con, sourceSchemaName=sourceSchemaName, runId=runId, metrics=[metrics] + fileMetrics)
+    return dict(metrics, files=fileMetrics)
+
+
+def __getTableMemory(table):
+
+    import os
+
+    # Estimated memory used to import a table: the size of the data held at once (the
+    # chunk written and the chunks read ahead of each file read in parallel, or the
+    # whole file when not read in chunks) times import_memory_expansion, the size of
+    # the parsed data relative to the text
+    filePaths = __getFilePaths(table['file_name'])
+    dataBytes = sum(os.path.getsize(filePath) for filePath in filePaths)
+    parts = sum(-(-os.path.getsize(filePath) // Config.import_split_bytes) if __isSplitFile(filePath) else 1 for filePath in filePaths)
+    chunkBytes = __getChunkBytes(filePaths[0])
+    if chunkBytes:
+        dataBytes = min(dataBytes, chunkBytes * (1 + Config.import_read_ahead_chunks) * min(parts, max(1, Config.import_file_workers)))
+    return int(dataBytes * Config.import_memory_expansion)
+
+
+def __importTableWorker(sourceSchemaName, table, fileSeparator, runId, sender):
+
+    import traceback
+
+    con = __getConnection()
+    try:
+        sender.send(('done', importTable(con=con, sourceSchemaName=sourceSchemaName, table=table, fileSeparator=fileSeparator, runId=runId)))
+    except BaseException:
+        sender.send(('failed', traceback.format_exc()))
+    finally:
+        sender.close()
+        con.close()
+
+
+def __importTables(con, sourceSchemaName, tables, fileSeparator, runId):
+
+    import multiprocessing
+    import multiprocessing.connection
+    import psutil
+
+    if Config.import_table_workers <= 1:
+        return [importTable(con=con, sourceSchemaName=sourceSchemaName, table=table, fileSeparator=fileSeparator, runId=runId) for table in tables]
+
+    # Tables are imported by up to import_table_workers processes, each with its own
+    # connection. A table is started once the estimated memory of the tables being
+    # imported leaves room for it within the budget (a table larger than the budget is
+    # imported on its own). The largest tables are started first, and the small ones
+    # fill the gaps while they are being imported.
+    memoryBudget = Config.import_memory_budget or psutil.virtual_memory().available // 2
+    tableMemory = {table['table_name']: __getTableMemory(table) for table in tables}
+    pending = sorted(tables, key=lambda table: tableMemory[table['table_name']], reverse=True)
+    log.info("Importing " + str(len(tables)) + " tables using " + str(Config.import_table_workers) + " worker processes and " + str(memoryBudget // 1024 // 1024) + " MB of memory")
+
+    # The import tables are created here rather than by all the workers at once
+    __createImportTables(con=con, sourceSchemaName=sourceSchemaName)
+
+    running = {}
+    tableMetrics = {}
+    failures = []
+    while len(running) > 0 or (len(pending) > 0 and len(failures) == 0):
+        usedMemory = sum(tableMemory[table['table_name']] for process, table in running.values())
+        for table in list(pending):
+            if len(failures) > 0 or len(running) >= Config.import_table_workers:
+                break
+            if len(running) > 0 and usedMemory + tableMemory[table['table_name']] > memoryBudget:
+                continue
+            log.info("Starting import of table: " + sourceSchemaName + "." + table['table_name'] + " (estimated " + str(tableMemory[table['table_name']] // 1024 // 1024) + " MB)")
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=__importTableWorker, args=(sourceSchemaName, table, fileSeparator, runId, sender))
+            process.start()
+            sender.close()
+            running[receiver] = (process, table)
+            usedMemory += tableMemory[table['table_name']]
+            pending.remove(table)
+
+        # A worker sends the metrics of its table, or the error, before it exits
+        for receiver in multiprocessing.connection.wait(list(running.keys())):
+            process, table = running.pop(receiver)
+            try:
+                result = receiver.recv()
+            except EOFError:
+                process.join()
+                result = ('failed', "Worker process exited with code " + str(process.exitcode))
+            receiver.close()
+            process.join()
+            if result[0] == 'done':
+                tableMetrics[table['table_name']] = result[1]
+            else:
+                log.error("Import of table: " + sourceSchemaName + "." + table['table_name'] + " failed\n" + result[1])
+                failures.append(table['table_name'])
+
+    # Tables left unfinished are resumed by the next import
+    if len(failures) > 0:
+        raise RuntimeError("Import of tables: " + ", ".join(failures) + " failed")
+    return [tableMetrics[table['table_name']] for table in tables]
+
+
+def importDataCsv(con, sourceSchemaName):
+
+    import datetime
+
+    runId = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    startedAt = datetime.datetime.now()
+    tableMetrics = __importTables(
         con=con,
         sourceSchemaName=sourceSchemaName,
-        filePath = Config.chartevents['file_name'],
-        fileSeparator=','
+        tables=Config.source_tables,
+        fileSeparator=',',
+        runId=runId
         )
-    # filePath = '/superbugai-data/mimiciv/1.0/icu/xaa'
-    # importChartEvents(
-    #     con=con,
-    #     sourceSchemaName=sourceSchemaName,
-    #     filePath = filePath,
-    #     fileSeparator=','
-    #     )
-    # for i in ['b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u']:
-    #     filePath = '/superbugai-data/mimiciv/1.0/icu/xa'
-    #     importChartEvents(
-    #         con=con,
-    #         sourceSchemaName=sourceSchemaName,
-    #         filePath = filePath + i,
-    #         fileSeparator=',',
-    #         createSchema=False
-    #         )
+
+    # Once every table is imported the next import starts from the beginning
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""DELETE FROM """ + sourceSchemaName + """.IMPORT_PROGRESS""")
+
+    if Config.import_metrics_report:
+        __writeMetricsReport(runId=runId, startedAt=startedAt, tableMetrics=tableMetrics)
@@ -27,6 +27,25 @@ def __saveDataframe(con, destinationSchemaName, destinationTableName, df, dfColu
             cur.close()
 
 
+def __copyVocabulary(con, destinationSchemaName, destinationTableName, filePath):
+
+    # The Athena files are tab separated without quoting, so quotes and backslashes in
+    # the names are plain characters. They are copied as CSV with a quote character
+    # that does not occur in them (backspace), so that only the empty fields are NULL.
+    # The dates (YYYYMMDD) are converted to DATE by the database as they are copied.
+    with open(filePath, 'rb') as f:
+        columnNames = f.readline().decode('utf-8').rstrip('\r\n').split('\t')
+        f.seek(0)
+        copyQuery = """COPY """ + destinationSchemaName + """.""" + destinationTableName + """ (""" + ", ".join(columnNames) + """)
+            FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER E'\\t', QUOTE E'\\b')
+            """
+        log.info("Copying file: " + filePath + " to table: " + destinationSchemaName + '.' + destinationTableName)
+        with con:
+            with con.cursor() as cursor:
+                cursor.copy_expert(copyQuery, f, size=1024 * 1024)
+                log.info("Copied " + str(cursor.rowcount) + " rows to table: " + destinationSchemaName + '.' + destinationTableName)
+
+
 def createConcept(con, etlSchemaName, filePath):
     log.info("Creating table: " + etlSchemaName + ".voc_concept")
     dropQuery = """drop table if exists """ + etlSchemaName + """.voc_concept cascade"""
@@ -49,13 +68,7 @@ def createConcept(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    df['valid_start_date'] = pd.to_datetime(df['valid_start_date'], unit='s')
-    df['valid_end_date'] = pd.to_datetime(df['valid_end_date'], unit='s')
-    dfColumns = ['concept_id', 'concept_name', 'domain_id', 'vocabulary_id', 'concept_class_id', 'standard_concept', 'concept_code', 'valid_start_date', 'valid_end_date', 'invalid_reason']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept', filePath=filePath)
 
 
 def createVocabulary(con, etlSchemaName, filePath):
@@ -75,11 +88,7 @@ def createVocabulary(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['vocabulary_id', 'vocabulary_name', 'vocabulary_reference', 'vocabulary_version', 'vocabulary_concept_id']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_vocabulary', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_vocabulary', filePath=filePath)
 
 
 def createDomain(con, etlSchemaName, filePath):
@@ -97,11 +106,7 @@ def createDomain(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['domain_id', 'domain_name', 'domain_concept_id']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_domain', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_domain', filePath=filePath)
 
 
 def createConceptClass(con, etlSchemaName, filePath):
@@ -119,11 +124,7 @@ def createConceptClass(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['concept_class_id', 'concept_class_name', 'concept_class_concept_id']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_class', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_class', filePath=filePath)
 
 
 def createConceptRelationship(con, etlSchemaName, filePath):
@@ -144,13 +145,7 @@ def createConceptRelationship(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    df['valid_start_date'] = pd.to_datetime(df['valid_start_date'], unit='s')
-    df['valid_end_date'] = pd.to_datetime(df['valid_end_date'], unit='s')
-    dfColumns = ['concept_id_1', 'concept_id_2', 'relationship_id', 'valid_start_date', 'valid_end_date', 'invalid_reason']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_relationship', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_relationship', filePath=filePath)
 
 
 def createRelationship(con, etlSchemaName, filePath):
@@ -171,11 +166,7 @@ def createRelationship(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['relationship_id', 'relationship_name', 'is_hierarchical', 'defines_ancestry', 'reverse_relationship_id', 'relationship_concept_id']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_relationship', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_relationship', filePath=filePath)
 
 
 def createConceptSynonym(con, etlSchemaName, filePath):
@@ -193,11 +184,7 @@ def createConceptSynonym(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['concept_id', 'concept_synonym_name', 'language_concept_id']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_synonym', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_synonym', filePath=filePath)
 
 
 def createConceptAncestor(con, etlSchemaName, filePath):
@@ -216,11 +203,7 @@ def createConceptAncestor(con, etlSchemaName, filePath):
             cursor.execute(dropQuery)
             cursor.execute(createQuery)
 
-    import pandas as pd
-
-    df = pd.read_csv(filePath, sep='\t')
-    dfColumns = ['ancestor_concept_id', 'descendant_concept_id', 'min_levels_of_separation', 'max_levels_of_separation']
-    __saveDataframe(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_ancestor', df=df, dfColumns=dfColumns)
+    __copyVocabulary(con=con, destinationSchemaName=etlSchemaName, destinationTableName='voc_concept_ancestor', filePath=filePath)
 
 
 def createLookupConcept(con, etlSchemaName, lookupSchemaName):
@@ -775,26 +758,250 @@ def migrateCustomMapping(con, isFromFile):
     importCustomVocabulary(con=con, isFromFile=isFromFile)
 
 
+def __getConnection():
+
+    import psycopg2
+
+    return psycopg2.connect(
+        dbname=Config.sql_db_name,
+        user=Config.sql_user_name,
+        host=Config.sql_host_name,
+        port=Config.sql_port_number,
+        password=Config.sql_password
+        )
+
+
+def __getVocabularyBytes(vocabularyName):
+
+    import os
+
+    return os.path.getsize(Config.vocabulary[vocabularyName])
+
+
+def __runVocabularyWorker(function, kwargs):
+
+    con = __getConnection()
+    try:
+        function(con=con, **kwargs)
+    finally:
+        con.close()
+
+
+def __runVocabularyTasks(con, tasks):
+
+    # The tasks are independent, so they are run by up to vocabulary_workers processes,
+    # each with its own connection. They are given the largest first, so that the
+    # relationship and ancestor tables each start on a worker of their own and the
+    # small tables are done by the other workers in the meantime.
+    tasks = [(function, kwargs) for vocabularyName, function, kwargs in sorted(tasks, key=lambda task: __getVocabularyBytes(task[0]), reverse=True)]
+    if Config.vocabulary_workers <= 1:
+        for function, kwargs in tasks:
+            function(con=con, **kwargs)
+    else:
+        import multiprocessing
+
+        workers = min(Config.vocabulary_workers, len(tasks))
+        log.info("Running " + str(len(tasks)) + " vocabulary tasks using " + str(workers) + " worker processes")
+        with multiprocessing.Pool(processes=workers) as pool:
+            pool.starmap(__runVocabularyWorker, tasks, chunksize=1)
+
+
+def __getVocabularyVersions():
+
+    with open(Config.vocabulary['vocabulary'], 'r', encoding='utf-8') as f:
+        columnNames = f.readline().rstrip('\r\n').split('\t')
+        rows = [dict(zip(columnNames, line.rstrip('\r\n').split('\t'))) for line in f]
+    return '; '.join(row['vocabulary_id'] + ' ' + row['vocabulary_version'] for row in rows if row.get('vocabulary_version'))
+
+
+def __getVocabularyFingerprint(vocabularyNames, vocabularyVersions):
+
+    import hashlib
+
+    log.info("Computing the fingerprint of the Athena vocabulary files")
+    fingerprint = hashlib.md5(vocabularyVersions.encode())
+    for vocabularyName in vocabularyNames:
+        fingerprint.update(vocabularyName.encode())
+        with open(Config.vocabulary[vocabularyName], 'rb') as f:
+            for block in iter(lambda: f.read(8 * 1024 * 1024), b''):
+                fingerprint.update(block)
+    return fingerprint.hexdigest()
+
+
+def __createVocabularyFingerprintTable(con, etlSchemaName):
+
+    createQuery = """CREATE TABLE IF NOT EXISTS """ + etlSchemaName + """.VOCABULARY_FINGERPRINT
+        (
+            FINGERPRINT VARCHAR(32) NOT NULL,
+            VOCABULARY_VERSIONS TEXT,
+            SOURCE_SCHEMA_NAME VARCHAR(100) NOT NULL,
+            LOADED_AT TIMESTAMP NOT NULL
+        )
+        ;
+        """
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(createQuery)
+
+
+def __saveVocabularyFingerprint(con, etlSchemaName, fingerprint, vocabularyVersions, sourceSchemaName):
+
+    # The fingerprint is removed while the tables are loaded, and saved once they are
+    deleteQuery = """DELETE FROM """ + etlSchemaName + """.VOCABULARY_FINGERPRINT"""
+    insertQuery = """INSERT INTO """ + etlSchemaName + """.VOCABULARY_FINGERPRINT
+        (FINGERPRINT, VOCABULARY_VERSIONS, SOURCE_SCHEMA_NAME, LOADED_AT)
+        VALUES (%s, %s, %s, NOW())
+        """
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(deleteQuery)
+            if fingerprint is not None:
+                cursor.execute(insertQuery, (fingerprint, vocabularyVersions, sourceSchemaName))
+
+
+def __getVocabularyTables(con, schemaName, vocabularyNames, tableTypes):
+
+    selectQuery = """SELECT table_name FROM information_schema.tables
+        WHERE table_schema = %s AND table_name IN %s AND table_type IN %s
+        """
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(selectQuery, (schemaName, tuple('voc_' + vocabularyName for vocabularyName in vocabularyNames), tuple(tableTypes)))
+            return [row[0] for row in cursor.fetchall()]
+
+
+def __getVocabularySource(con, schemaName, fingerprint):
+
+    # The schema holding the tables recorded with the fingerprint in the schema, or None
+    # if the schema does not record the fingerprint
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute("""SELECT TO_REGCLASS(%s)""", (schemaName + '.vocabulary_fingerprint', ))
+            if cursor.fetchone()[0] is None:
+                return None
+            cursor.execute("""SELECT SOURCE_SCHEMA_NAME FROM """ + schemaName + """.VOCABULARY_FINGERPRINT WHERE FINGERPRINT = %s""", (fingerprint,))
+            row = cursor.fetchone()
+    return row[0] if row is not None else None
+
+
+def __findVocabularySchema(con, etlSchemaName, fingerprint, vocabularyNames):
+
+    # The schema with the tables of the vocabulary bundle with the fingerprint: the ETL
+    # schema itself when they are already loaded there, or else the schema the tables of
+    # another ETL schema with the fingerprint were loaded to (None if there is none)
+    selectSchemasQuery = """SELECT table_schema FROM information_schema.tables WHERE table_name = 'vocabulary_fingerprint'"""
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(selectSchemasQuery)
+            schemaNames = sorted([row[0] for row in cursor.fetchall()], key=lambda schemaName: schemaName != etlSchemaName)
+    for schemaName in schemaNames:
+        sourceSchemaName = __getVocabularySource(con=con, schemaName=schemaName, fingerprint=fingerprint)
+        if sourceSchemaName is None:
+            continue
+        # The tables of the schema the fingerprint points to may have been loaded again
+        # from other files since, so that schema has to record the fingerprint itself
+        if sourceSchemaName != schemaName and __getVocabularySource(con=con, schemaName=sourceSchemaName, fingerprint=fingerprint) != sourceSchemaName:
+            continue
+        if schemaName == etlSchemaName and len(__getVocabularyTables(con=con, schemaName=schemaName, vocabularyNames=vocabularyNames, tableTypes=['BASE TABLE', 'VIEW'])) == len(vocabularyNames):
+            return schemaName
+        if sourceSchemaName != etlSchemaName and len(__getVocabularyTables(con=con, schemaName=sourceSchemaName, vocabularyNames=vocabularyNames, tableTypes=['BASE TABLE'])) == len(vocabularyNames):
+            return sourceSchemaName
+    return None
+
+
+def __dropVocabularyViews(con, etlSchemaName, vocabularyNames):
+
+    # Tables referenced from another schema are views, which are dropped before the
+    # tables are loaded or cloned
+    viewNames = __getVocabularyTables(con=con, schemaName=etlSchemaName, vocabularyNames=vocabularyNames, tableTypes=['VIEW'])
+    with con:
+        with con.cursor() as cursor:
+            for viewName in viewNames:
+                cursor.execute("""drop view if exists """ + etlSchemaName + """.""" + viewName + """ cascade""")
+
+
+def cloneVocabulary(con, etlSchemaName, sourceSchemaName, vocabularyName):
+    log.info("Creating table: " + etlSchemaName + ".voc_" + vocabularyName + " from " + sourceSchemaName + ".voc_" + vocabularyName)
+    dropQuery = """drop table if exists """ + etlSchemaName + """.voc_""" + vocabularyName + """ cascade"""
+    if Config.vocabulary_cache == 'reference':
+        createQueries = [
+            """CREATE VIEW """ + etlSchemaName + """.voc_""" + vocabularyName + """ AS SELECT * FROM """ + sourceSchemaName + """.voc_""" + vocabularyName,
+            ]
+    else:
+        createQueries = [
+            """CREATE TABLE """ + etlSchemaName + """.voc_""" + vocabularyName + """ (LIKE """ + sourceSchemaName + """.voc_""" + vocabularyName + """ INCLUDING ALL)""",
+            """INSERT INTO """ + etlSchemaName + """.voc_""" + vocabularyName + """ SELECT * FROM """ + sourceSchemaName + """.voc_""" + vocabularyName,
+            ]
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute(dropQuery)
+            for createQuery in createQueries:
+                cursor.execute(createQuery)
+
+
 def importAthenaVocabulary(con):
-    createConcept(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['concept'])
-    createVocabulary(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['vocabulary'])
-    createDomain(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['domain'])
-    createConceptClass(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['concept_class'])
-    createConceptRelationship(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['concept_relationship'])
-    createRelationship(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['relationship'])
-    createConceptSynonym(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['concept_synonym'])
-    createConceptAncestor(con=con, etlSchemaName=Config.etl_schema_name, filePath = Config.vocabulary['concept_ancestor'])
+    vocabularyFunctions = [
+        ('concept', createConcept),
+        ('vocabulary', createVocabulary),
+        ('domain', createDomain),
+        ('concept_class', createConceptClass),
+        ('concept_relationship', createConceptRelationship),
+        ('relationship', createRelationship),
+        ('concept_synonym', createConceptSynonym),
+        ('concept_ancestor', createConceptAncestor),
+        ]
+    vocabularyNames = [vocabularyName for vocabularyName, function in vocabularyFunctions]
+    etlSchemaName = Config.etl_schema_name.lower()
+
+    # The bundle is identified by a fingerprint of its files, saved with the tables. The
+    # files are not loaded again when the ETL schema has the tables of the same bundle,
+    # and the tables are cloned (or referenced) when another ETL schema has them.
+    fingerprint = None
+    vocabularyVersions = None
+    sourceSchemaName = None
+    __createVocabularyFingerprintTable(con=con, etlSchemaName=etlSchemaName)
+    if Config.vocabulary_cache is not None:
+        vocabularyVersions = __getVocabularyVersions()
+        fingerprint = __getVocabularyFingerprint(vocabularyNames=vocabularyNames, vocabularyVersions=vocabularyVersions)
+        sourceSchemaName = __findVocabularySchema(con=con, etlSchemaName=etlSchemaName, fingerprint=fingerprint, vocabularyNames=vocabularyNames)
+        if sourceSchemaName == etlSchemaName:
+            log.info("The Athena vocabulary files are unchanged (fingerprint " + fingerprint + "), skipping the import")
+            return
+
+    __dropVocabularyViews(con=con, etlSchemaName=etlSchemaName, vocabularyNames=vocabularyNames)
+    __saveVocabularyFingerprint(con=con, etlSchemaName=etlSchemaName, fingerprint=None, vocabularyVersions=None, sourceSchemaName=None)
+    if sourceSchemaName is not None:
+        log.info("The Athena vocabulary files are loaded in schema: " + sourceSchemaName + " (fingerprint " + fingerprint + "), using its tables")
+        __runVocabularyTasks(con=con, tasks=[
+            (vocabularyName, cloneVocabulary, {'etlSchemaName': etlSchemaName, 'sourceSchemaName': sourceSchemaName, 'vocabularyName': vocabularyName})
+            for vocabularyName in vocabularyNames
+            ])
+        if Config.vocabulary_cache != 'reference':
+            sourceSchemaName = etlSchemaName
+    else:
+        __runVocabularyTasks(con=con, tasks=[
+            (vocabularyName, function, {'etlSchemaName': etlSchemaName, 'filePath': Config.vocabulary[vocabularyName]})
+            for vocabularyName, function in vocabularyFunctions
+            ])
+        sourceSchemaName = etlSchemaName
+    if fingerprint is not None:
+        __saveVocabularyFingerprint(con=con, etlSchemaName=etlSchemaName, fingerprint=fingerprint, vocabularyVersions=vocabularyVersions, sourceSchemaName=sourceSchemaName)
 
 
 def stageAthenaVocabulary(con):
-    createLookupConcept(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupConceptRelationship(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupVocabulary(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupConceptClass(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupConceptAncestor(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupConceptSynonym(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupDomain(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
-    createLookupRelationship(con=con, etlSchemaName=Config.etl_schema_name, lookupSchemaName=Config.lookup_schema_name)
+    __runVocabularyTasks(con=con, tasks=[
+        (vocabularyName, function, {'etlSchemaName': Config.etl_schema_name, 'lookupSchemaName': Config.lookup_schema_name})
+        for vocabularyName, function in [
+            ('concept', createLookupConcept),
+            ('concept_relationship', createLookupConceptRelationship),
+            ('vocabulary', createLookupVocabulary),
+            ('concept_class', createLookupConceptClass),
+            ('concept_ancestor', createLookupConceptAncestor),
+            ('concept_synonym', createLookupConceptSynonym),
+            ('domain', createLookupDomain),
+            ('relationship', createLookupRelationship),
+            ]
+        ])
 
 
 def importCustomVocabulary(con, isFromFile):
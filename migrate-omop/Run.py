@@ -207,6 +207,12 @@ if __name__ == "__main__":
                         help='Create lookup by importing Athena vocabulary and custom mapping')
     parser.add_argument('-f', '--import_file', action='store_true',
                         help='Import EHR from a csv files')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Import only the rows added since the last import (with -f)')
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                        help='Import only this fraction of the patients, e.g. 0.01 (with -f)')
+    parser.add_argument('--sample_subjects', metavar='FILE',
+                        help='Import only the patients listed in this file, one subject_id per line (with -f)')
     parser.add_argument('-s', '--stage', action='store_true',
                         help='Stage the data on the ETL schema')
     parser.add_argument('-m', '--generate_mapping', action='store_true',
@@ -220,6 +226,15 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    if args.incremental:
+        Config.import_mode = 'incremental'
+
+    if args.sample is not None:
+        Config.import_sample_fraction = args.sample
+
+    if args.sample_subjects is not None:
+        Config.import_sample_subjects = args.sample_subjects
+
     log.info("Start!!")
 
     con = getConnnection()
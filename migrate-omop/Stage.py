@@ -140,6 +140,8 @@ def createLabEventsStaging(con, sourceSchemaName, destinationSchemaName):
             itemid                              AS itemid,
             valueuom                            AS valueuom,
             value                               AS value,
+            value_parsed_num                    AS value_parsed_num,
+            value_parsed_unit                   AS value_parsed_unit,
             flag                                AS flag,
             ref_range_lower                     AS ref_range_lower,
             ref_range_upper                     AS ref_range_upper,
@@ -265,6 +267,8 @@ def createPrescriptionsStaging(con, sourceSchemaName, destinationSchemaName):
             dose_val_rx                         AS dose_val_rx,
             dose_unit_rx                        AS dose_unit_rx,
             form_val_disp                       AS form_val_disp,
+            form_val_disp_parsed_num            AS form_val_disp_parsed_num,
+            form_val_disp_parsed_unit           AS form_val_disp_parsed_unit,
             form_unit_disp                      AS form_unit_disp,
             doses_per_24_hrs                    AS doses_per_24_hrs,
             route                               AS route,
@@ -492,6 +496,8 @@ def createChartEventsStaging(con, sourceSchemaName, destinationSchemaName):
             value       AS value,
             valuenum    AS valuenum,
             valueuom    AS valueuom,
+            value_parsed_num    AS value_parsed_num,
+            value_parsed_unit   AS value_parsed_unit,
             'chartevents'                       AS load_table_id,
             ('x'||substr(md5(random():: text),1,8))::bit(32)::int     AS load_row_id,
             jsonb_build_object('subject_id',subject_id, 'hadm_id',hadm_id, 'stay_id',  stay_id, 'charttime', charttime)                                 AS trace_id
@@ -26,7 +26,7 @@ def createPrescriptionsClean(con, etlSchemaName):
             CAST(src.ndc AS TEXT)     AS ndc_source_code, -- ndc was used for automatic/manual mapping,
             'NDC'                       AS ndc_source_vocabulary,
             src.form_val_disp           AS form_val_disp,
-            CAST((REGEXP_MATCHES(src.form_val_disp, '[-]?[\d]+[.]?[\d]*'))[1] AS FLOAT)  AS quantity,
+            src.form_val_disp_parsed_num  AS quantity, -- first number in form_val_disp, parsed on import
             -- COALESCE(
             --     -- src.drug, src.drug_name_poe, src.drug_name_generic,'')
             --     src.drug, '')
@@ -55,6 +55,7 @@ def createPrescriptionsClean(con, etlSchemaName):
         WHERE
             src.starttime IS NOT NULL
             AND src.drug IS NOT NULL
+            AND src.form_val_disp_parsed_num IS NOT NULL -- as REGEXP_MATCHES returned no row without a number
         ;
         """
     with con:
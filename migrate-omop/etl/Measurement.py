@@ -100,13 +100,13 @@ def createCharteventsClean(con, etlSchemaName):
             di.label                        AS source_label,
             src.charttime                   AS start_datetime,
             TRIM(src.value)                 AS value,
-            CASE
-                WHEN REGEXP_MATCH(TRIM(src.value), '^[-]?[\d]+[.]?[\d]*[ ]*[a-z]+$') IS NOT NULL THEN CAST((REGEXP_MATCH(src.value, '[-]?[\d]+[.]?[\d]*'))[1] AS FLOAT)
+            CASE -- value_parsed_unit is set when the value is a number followed by a unit, parsed on import
+                WHEN src.value_parsed_unit IS NOT NULL THEN src.value_parsed_num
                 ELSE src.valuenum																			   
             END                        AS valuenum,
             
             CASE
-                WHEN REGEXP_MATCH(TRIM(src.value), '^[-]?[\d]+[.]?[\d]*[ ]*[a-z]+$') IS NOT NULL THEN REGEXP_MATCH(src.value, '[a-z]+')::character varying(20)
+                WHEN src.value_parsed_unit IS NOT NULL THEN src.value_parsed_unit::character varying(20)
                 ELSE src.valueuom
             END                AS valueuom, -- unit of measurement
             --
@@ -350,7 +350,7 @@ def createMeasurementsLabeventsClean(con, etlSchemaName):
             src.itemid                              AS itemid,
             src.value                               AS value, -- value_source_value
             REGEXP_MATCHES(src.value, '^(\<=|\>=|\>|\<|=|)')   AS value_operator,
-            REGEXP_MATCHES(src.value, '[-]?[\d]+[.]?[\d]*')    AS value_number, -- assume "-0.34 etc"
+            src.value_parsed_num                    AS value_number, -- first number in value, parsed on import
             CASE
             WHEN TRIM(src.valueuom) <> '' THEN src  .valueuom 
             ELSE NULL    
@@ -911,7 +911,7 @@ def createMeasurements(con, etlSchemaName):
             CAST(NULL AS TEXT)                    AS measurement_time,
             32856                                   AS measurement_type_concept_id, -- OMOP4976929 Lab
             src.operator_concept_id                 AS operator_concept_id,
-            CAST(src.value_as_number[1] AS FLOAT)    AS value_as_number,  -- to move CAST to mapped/clean
+            src.value_as_number                     AS value_as_number,
             CAST(NULL AS INTEGER)                     AS value_as_concept_id,
             src.unit_concept_id                     AS unit_concept_id,
             src.range_low                           AS range_low,
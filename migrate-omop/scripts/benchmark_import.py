@@ -0,0 +1,255 @@
+# This Python code benchmarks the import of the EHR data into the database with each reader engine and write method
+# It generates synthetic CSV files shaped like LABEVENTS, CHARTEVENTS and PRESCRIPTIONS (the columns and types of their
+# definitions in Config.py) at several numbers of rows, and imports each of them into a throwaway schema with
+#   insert - batched INSERT statements using psycopg2.extras.execute_batch (import_write_method = 'insert')
+#   values - multi-row INSERT statements using psycopg2.extras.execute_values
+#   copy   - COPY ... FROM STDIN in the CSV format (import_write_method = 'copy')
+#   binary - COPY ... FROM STDIN in the binary format (import_write_method = 'binary')
+# Each import runs in a process of its own, and the time taken to parse and to write the rows, the rows/s and the peak
+# memory of the process are reported, and appended to a CSV file to compare the results between releases.
+#
+# Use a local throwaway database (e.g. docker run -p 5434:5432 -e POSTGRES_PASSWORD=mysecretpassword postgres) with the
+# connection details of Config.py. The schema is dropped at the end.
+#
+# Run from the migrate-omop directory:
+#   python scripts/benchmark_import.py [--rows 100000 1000000 10000000] [--tables labevents chartevents prescriptions]
+#       [--engines pandas pyarrow] [--methods insert values copy binary] [--data_dir /tmp/benchmark_import]
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Config
+import Import
+
+
+# Values of the text columns, including NULLs, quotes, separators and line breaks that the writers have to escape
+textValues = {
+    'value': ['7.4', '12.5', '140', '0.9', 'Normal', '5 mg', 'NEG', '___', None],
+    'valueuom': ['mg/dL', 'mEq/L', 'K/uL', 'bpm', '%', None],
+    'flag': ['abnormal', None, None, None],
+    'priority': ['ROUTINE', 'STAT', None],
+    'comments': [None, None, None, None, 'Hemolysis, slight', 'Verified by "repeat" analysis.\nNotified Dr. ___'],
+    'drug_type': ['MAIN', 'BASE', 'ADDITIVE'],
+    'drug': ['Insulin', 'Heparin', 'Sodium Chloride 0.9%  Flush', 'Acetaminophen', None],
+    'gsn': ['004490', '016546 062106', None],
+    'ndc': ['00338004904', '63323026201', '0', None],
+    'prod_strength': ['1000mL Bag', '5000 Unit/mL - 1 mL Vial', '325mg Tablet', None],
+    'form_rx': ['TABLET', None, None],
+    'dose_val_rx': ['1', '2-4', '0.5', '5000', None],
+    'dose_unit_rx': ['mg', 'UNIT', 'mL', None],
+    'form_val_disp': ['1', '0.5', '2 tab', '10', None],
+    'form_unit_disp': ['TAB', 'VIAL', 'mL', None],
+    'route': ['PO', 'IV', 'SC', None],
+    }
+
+
+def generateColumn(column, sqlType, rows, rowOffset, isKey, rng):
+
+    import numpy as np
+    import pandas as pd
+
+    columnType = Import.__getColumnType(sqlType)
+    nullable = 'NOT NULL' not in sqlType.upper()
+    if isKey:
+        return pd.Series(np.arange(rowOffset + 1, rowOffset + rows + 1), dtype='Int64')
+    isTimestamp = sqlType.upper().startswith('TIMESTAMP')
+    if isTimestamp:
+        values = pd.Series(pd.Timestamp('2110-01-01') + pd.to_timedelta(rng.integers(0, 50 * 365 * 86400, rows), unit='s')).dt.strftime('%Y-%m-%d %H:%M:%S')
+    elif columnType == 'integer':
+        low, high = {'subject_id': (10000000, 10000000 + max(1, rows // 100)), 'hadm_id': (20000000, 20000000 + max(1, rows // 20)), 'itemid': (50800, 51800), 'warning': (0, 2)}.get(column, (0, 10 ** 8))
+        values = pd.Series(rng.integers(low, high, rows), dtype='Int64')
+    elif columnType == 'float':
+        values = pd.Series(np.round(rng.random(rows) * 200, 2))
+    else:
+        choices = textValues.get(column, ['text', 'other text', None])
+        values = pd.Series(np.array(choices, dtype=object)[rng.integers(0, len(choices), rows)])
+    # The text columns have their NULLs among textValues
+    if nullable and (columnType != 'text' or isTimestamp):
+        values = values.mask(rng.random(rows) < 0.1)
+    elif not nullable:
+        values = values.fillna(textValues.get(column, ['text'])[0])
+    return values
+
+
+def generateFile(tableName, rows, dataDir, blockRows=1000000):
+
+    import numpy as np
+    import pandas as pd
+
+    # Files are generated once for each number of rows and kept in dataDir
+    table = getattr(Config, tableName)
+    filePath = os.path.join(dataDir, tableName + '_' + str(rows) + '.csv')
+    if os.path.exists(filePath):
+        return filePath
+
+    print('Generating', filePath)
+    os.makedirs(dataDir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    keyColumn = table['primary_key'][0] if len(table['primary_key']) > 0 else None
+    with open(filePath + '.tmp', 'w', newline='') as f:
+        for rowOffset in range(0, rows, blockRows):
+            blockSize = min(blockRows, rows - rowOffset)
+            df = pd.DataFrame({
+                fileColumn: generateColumn(column=column, sqlType=table['columns'][column], rows=blockSize, rowOffset=rowOffset, isKey=column == keyColumn, rng=rng)
+                for column, fileColumn in table['column_mapping'].items()
+                })
+            df.to_csv(f, header=rowOffset == 0, index=False)
+    os.rename(filePath + '.tmp', filePath)
+    return filePath
+
+
+def saveValues(con, schemaName, tableName, df, dfColumns):
+
+    import pandas as pd
+    import psycopg2.extras
+
+    # Multi-row INSERT statements, with the values of up to 1000 rows each
+    if Import.__isArrowTable(df):
+        import pyarrow
+
+        df = df.select(dfColumns).to_pandas(types_mapper={pyarrow.int64(): pd.Int64Dtype()}.get)
+    values = df[dfColumns].astype(object)
+    values = values.where(values.notna(), None).values.tolist()
+    insertQuery = 'INSERT INTO ' + schemaName + '.' + tableName + ' ("' + '", "'.join(dfColumns) + '") VALUES %s'
+    with con.cursor() as cursor:
+        psycopg2.extras.execute_values(cursor, insertQuery, values, page_size=1000)
+
+
+def benchmarkImport(schemaName, table, filePath, engine, method, sender):
+
+    import resource
+
+    # Runs in a process of its own, so that the peak memory is that of this import
+    table = dict(table, file_name=filePath, reader_engine=engine)
+    dfColumns = list(table['columns'].keys())
+    columnTypes = [table['columns'][column] for column in dfColumns]
+    if method != 'values':
+        Config.import_write_method = method
+
+    con = Import.__getConnection()
+    try:
+        with con:
+            with con.cursor() as cursor:
+                cursor.execute('TRUNCATE ' + schemaName + '.' + table['table_name'])
+
+        rows = 0
+        parseSeconds = 0.0
+        writeSeconds = 0.0
+        chunks = Import.__readChunks(filePath=filePath, fileSeparator=',', table=table)
+        while True:
+            start = time.perf_counter()
+            df = next(chunks, None)
+            parseSeconds += time.perf_counter() - start
+            if df is None:
+                break
+            start = time.perf_counter()
+            with con:
+                if method == 'values':
+                    saveValues(con=con, schemaName=schemaName, tableName=table['table_name'], df=df, dfColumns=dfColumns)
+                else:
+                    Import.__saveDataframe(con=con, destinationSchemaName=schemaName, destinationTableName=table['table_name'], df=df, dfColumns=dfColumns, columnTypes=columnTypes)
+            writeSeconds += time.perf_counter() - start
+            rows += len(df)
+    finally:
+        con.close()
+
+    # ru_maxrss is in kilobytes on Linux
+    sender.send((rows, parseSeconds, writeSeconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+    sender.close()
+
+
+def runBenchmark(schemaName, table, filePath, engine, method):
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=benchmarkImport, args=(schemaName, table, filePath, engine, method, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None:
+        raise RuntimeError('Benchmark of ' + table['table_name'] + ' with ' + engine + ' and ' + method + ' failed with exit code ' + str(process.exitcode))
+    return result
+
+
+def getVersion():
+
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def report(tableName, rows, engine, method, result):
+
+    if result is None:
+        print('{:<14} {:>10} {:<8} {:<7} {:>9} {:>9} {:>12} {:>10}'.format(tableName, rows, engine, method, '', '', 'skipped', ''))
+        return
+    importedRows, parseSeconds, writeSeconds, peakRssBytes = result
+    seconds = parseSeconds + writeSeconds
+    print('{:<14} {:>10} {:<8} {:<7} {:>9.2f} {:>9.2f} {:>12.0f} {:>10.0f}'.format(tableName, importedRows, engine, method, parseSeconds, writeSeconds, importedRows / seconds if seconds > 0 else 0, peakRssBytes / 1024 / 1024))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark the import of EHR data with each reader engine and write method')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10 ** 5, 10 ** 6, 10 ** 7], help='Numbers of rows of the generated files')
+    parser.add_argument('--tables', nargs='+', default=['labevents', 'chartevents', 'prescriptions'], help='Source tables of Config.py to generate')
+    parser.add_argument('--engines', nargs='+', default=['pandas', 'pyarrow'], help='Reader engines')
+    parser.add_argument('--methods', nargs='+', default=['insert', 'values', 'copy', 'binary'], help='Write methods')
+    parser.add_argument('--statement_rows', type=int, default=10 ** 6, help='Largest number of rows written with INSERT statements (insert and values)')
+    parser.add_argument('--data_dir', default='/tmp/benchmark_import', help='Directory of the generated files')
+    parser.add_argument('--schema', default='import_benchmark', help='Throwaway schema the tables are created in')
+    parser.add_argument('--output', default='benchmark_import.csv', help='CSV file the results are appended to')
+    args = parser.parse_args()
+
+    runAt = datetime.datetime.now().isoformat(timespec='seconds')
+    version = getVersion()
+
+    con = Import.__getConnection()
+    with con:
+        with con.cursor() as cursor:
+            cursor.execute('CREATE SCHEMA IF NOT EXISTS ' + args.schema)
+
+    results = []
+    try:
+        print('{:<14} {:>10} {:<8} {:<7} {:>9} {:>9} {:>12} {:>10}'.format('table', 'rows', 'engine', 'method', 'parse s', 'write s', 'rows/s', 'peak MB'))
+        for tableName in args.tables:
+            # The tables are created as by the import (unlogged, with the constraints added
+            # after loading, per Config.py) but not partitioned
+            table = dict(getattr(Config, tableName), partition_column=None, hash_partition_column=None)
+            Import.__createTable(con=con, sourceSchemaName=args.schema, table=table)
+            for rows in args.rows:
+                filePath = generateFile(tableName=tableName, rows=rows, dataDir=args.data_dir)
+                for engine in args.engines:
+                    for method in args.methods:
+                        result = None
+                        if method not in ('insert', 'values') or rows <= args.statement_rows:
+                            result = runBenchmark(schemaName=args.schema, table=table, filePath=filePath, engine=engine, method=method)
+                            results.append([runAt, version, tableName, rows, engine, method] + list(result))
+                        report(tableName=tableName, rows=rows, engine=engine, method=method, result=result)
+    finally:
+        with con:
+            with con.cursor() as cursor:
+                cursor.execute('DROP SCHEMA ' + args.schema + ' CASCADE')
+        con.close()
+
+        if len(results) > 0:
+            import csv
+
+            writeHeader = not os.path.exists(args.output)
+            with open(args.output, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if writeHeader:
+                    writer.writerow(['run_at', 'version', 'table', 'rows', 'engine', 'method', 'parse_seconds', 'write_seconds', 'peak_rss_bytes', 'rows_per_second'])
+                for runAt, version, tableName, rows, engine, method, importedRows, parseSeconds, writeSeconds, peakRssBytes in results:
+                    writer.writerow([runAt, version, tableName, importedRows, engine, method, round(parseSeconds, 3), round(writeSeconds, 3), peakRssBytes, round(importedRows / (parseSeconds + writeSeconds)) if parseSeconds + writeSeconds > 0 else 0])
@@ -0,0 +1,44 @@
+# This Python code compares the pandas and pyarrow reader engines on the LABEVENTS file of the EHR data configured in Config.py
+# For each engine it reports the time taken to parse the file, and to parse it and encode it for COPY,
+# without writing anything to the database
+#
+# Run from the migrate-omop directory:
+#   python scripts/benchmark_readers.py [labevents file]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Config
+import Import
+
+
+def benchmarkLabEvents(filePath, engine, encode):
+
+    table = dict(Config.labevents, file_name=filePath, reader_engine=engine)
+    dfColumns = list(table['columns'].keys())
+    rows = 0
+    start = time.perf_counter()
+    for df in Import.__readChunks(filePath=filePath, fileSeparator=',', table=table):
+        rows += len(df)
+        if encode:
+            Import.__encodeDataframe(df=df, dfColumns=dfColumns).read()
+    return rows, time.perf_counter() - start
+
+
+def report(name, engine, rows, seconds):
+
+    print('{:<32} {:<8} {:>12} rows {:>9.2f} s {:>12.0f} rows/s'.format(name, engine, rows, seconds, rows / seconds if seconds > 0 else 0))
+
+
+if __name__ == "__main__":
+
+    labEventsFile = sys.argv[1] if len(sys.argv) > 1 else Config.labevents['file_name']
+
+    for engine in ['pandas', 'pyarrow']:
+        rows, seconds = benchmarkLabEvents(filePath=labEventsFile, engine=engine, encode=False)
+        report('LABEVENTS parse', engine, rows, seconds)
+        rows, seconds = benchmarkLabEvents(filePath=labEventsFile, engine=engine, encode=True)
+        report('LABEVENTS parse and encode', engine, rows, seconds)